@@ -0,0 +1,181 @@
+"""Сравнение хранилища состояний в SQLite с MemoryStorage.
+
+Запуск:
+
+    PYTHONPATH=chsu_bot python benchmarks/bench_fsm_storage.py --users 20000
+
+Каждый пользователь проходит начало выбора даты: состояние, дата
+в данных, чтение состояния и данных. Четверть пользователей доводит
+диалог до конца, остальные его бросают. Каждое хранилище замеряется
+в отдельном процессе: прирост RSS после всех диалогов, задержки
+записей и чтений, а для SQLite ещё и чтения пользователей,
+вытесненных из кэша в памяти.
+"""
+
+import argparse
+from array import array
+import asyncio
+import datetime
+import json
+from pathlib import Path
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiogram.dispatcher.storage import BaseStorage
+from db import Migrations, Storage
+from fsm_storage import SQLiteStorage
+
+STATE = "ScheduleDateSelection:date"
+PAGE_SIZE = resource.getpagesize()
+
+
+def get_rss() -> int:
+    """Получение текущего RSS процесса в мегабайтах."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE // 2**20
+
+
+async def timed(call: Awaitable, latencies: array) -> object:
+    """Выполнение вызова с замером времени."""
+    started = time.perf_counter()
+    try:
+        return await call
+    finally:
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_dialogs(storage: BaseStorage, users: int) -> dict[str, array]:
+    """Прохождение диалогов выбора даты всеми пользователями.
+
+    Задержки хранятся в массивах чисел, память которых вычитается
+    из прироста RSS.
+    """
+    writes = array("d")
+    reads = array("d")
+    for user in range(users):
+        address = {"chat": user, "user": user}
+        await timed(storage.set_state(**address, state=STATE), writes)
+        await timed(
+            storage.update_data(**address, date=datetime.datetime.now()),
+            writes,
+        )
+        await timed(storage.get_state(**address), reads)
+        await timed(storage.get_data(**address), reads)
+        if user % 4 == 0:
+            await timed(storage.reset_state(**address), writes)
+    return {"writes": writes, "reads": reads}
+
+
+def get_growth(rss_before: int, result: dict[str, array]) -> int:
+    """Получение прироста RSS без памяти замеров."""
+    timings = sum(len(latencies) for latencies in result.values()) * 8
+    return get_rss() - rss_before - timings // 2**20
+
+
+async def cold_reads(storage: BaseStorage, users: int) -> array:
+    """Чтение первых пользователей, которых уже нет в кэше."""
+    latencies = array("d")
+    for user in range(min(users, 1000)):
+        await timed(storage.get_data(chat=user, user=user), latencies)
+    return latencies
+
+
+async def measure_memory(users: int) -> dict:
+    """Замер MemoryStorage."""
+    storage = MemoryStorage()
+    rss_before = get_rss()
+    result = await run_dialogs(storage, users)
+    rss = get_growth(rss_before, result)
+    return {**result, "rss": rss, "cold": await cold_reads(storage, users)}
+
+
+async def measure_sqlite(users: int, cache_size: int) -> dict:
+    """Замер SQLiteStorage на БД-файле."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "bench.db")
+        async with Storage(path) as db:
+            await Migrations(db.writer).apply()
+            storage = SQLiteStorage(db, cache_size=cache_size)
+            rss_before = get_rss()
+            result = await run_dialogs(storage, users)
+            rss = get_growth(rss_before, result)
+            cold = await cold_reads(storage, users)
+    return {**result, "rss": rss, "cold": cold}
+
+
+def describe(latencies: list[float]) -> str:
+    """Описание распределения задержек в микросекундах."""
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"p50 {statistics.median(ordered) * 10**6:.0f} мкс, "
+        f"p99 {p99 * 10**6:.0f} мкс"
+    )
+
+
+def run_storage(args: argparse.Namespace, storage: str) -> dict:
+    """Запуск замера хранилища в отдельном процессе."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--storage",
+            storage,
+            "--users",
+            str(args.users),
+            "--cache-size",
+            str(args.cache_size),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def compare(args: argparse.Namespace) -> None:
+    """Сравнение двух хранилищ."""
+    for storage in ("memory", "sqlite"):
+        result = run_storage(args, storage)
+        print(f"{storage}: RSS +{result['rss']} МБ")
+        for name in ("writes", "reads", "cold"):
+            print(f"  {name:>6}: {describe(result[name])}")
+
+
+def parse_args() -> argparse.Namespace:
+    """Получение параметров запуска."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--storage", choices=["memory", "sqlite"])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Запуск замера."""
+    args = parse_args()
+    if args.storage is None:
+        compare(args)
+        return
+    if args.storage == "memory":
+        result = asyncio.run(measure_memory(args.users))
+    else:
+        result = asyncio.run(measure_sqlite(args.users, args.cache_size))
+    print(
+        json.dumps(
+            {
+                name: value if name == "rss" else value.tolist()
+                for name, value in result.items()
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
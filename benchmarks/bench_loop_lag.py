@@ -0,0 +1,100 @@
+"""Замер блокировки цикла событий при отрисовке расписания.
+
+Запуск:
+
+    PYTHONPATH=chsu_bot python benchmarks/bench_loop_lag.py --groups 3000
+
+Расписание всех групп на два дня создаётся локальной заменой API ЧГУ
+и отрисовывается так же, как при обновлении: прямо в цикле событий
+(как до выноса отрисовки), через Reloader.render_changed на пуле
+потоков и на пуле процессов. Для каждого способа LoopLagMonitor
+выдаёт самую долгую и суммарную задержку цикла событий.
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import time
+from typing import Awaitable
+
+from fake_api import FakeTimetable
+from loguru import logger
+from schedule import Schedule
+from update_schedule import LoopLagMonitor, Reloader, render_batch
+
+DATES = ("05.02.2024", "06.02.2024")
+GroupDays = dict[int, dict[str, list[dict]]]
+
+
+def get_groups(groups: int, lectures_per_day: int) -> GroupDays:
+    """Получение расписания всех групп, разложенного по датам."""
+    timetable = FakeTimetable(groups, lectures_per_day)
+    return {
+        group["id"]: {
+            date: timetable.get_group_events(date, group["id"])
+            for date in DATES
+        }
+        for group in timetable.groups
+    }
+
+
+async def render_inline(groups: GroupDays) -> None:
+    """Отрисовка всех групп прямо в цикле событий."""
+    render_batch(
+        Schedule(),
+        [
+            (group_id, days[DATES[0]], days[DATES[1]], None)
+            for group_id, days in groups.items()
+        ],
+    )
+
+
+async def render_in_executor(
+    groups: GroupDays, executor: Executor, batch_size: int
+) -> None:
+    """Отрисовка всех групп пачками через Reloader.render_changed."""
+    reloader = Reloader(
+        logger, None, Schedule(), None, None, 2, executor, batch_size
+    )
+    await reloader.render_changed(groups, *DATES)
+
+
+async def measure(name: str, render: Awaitable) -> None:
+    """Замер задержек цикла событий во время отрисовки."""
+    started = time.perf_counter()
+    async with LoopLagMonitor() as lag:
+        await render
+    print(
+        f"{name:>8}: {time.perf_counter() - started:.2f} с, "
+        f"макс. задержка {lag.max_lag * 1000:.0f} мс, "
+        f"суммарная {lag.total_lag * 1000:.0f} мс"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Сравнение способов отрисовки."""
+    groups = get_groups(args.groups, args.lectures_per_day)
+    await measure("в цикле", render_inline(groups))
+    with ThreadPoolExecutor(args.workers) as executor:
+        await measure(
+            "потоки", render_in_executor(groups, executor, args.batch_size)
+        )
+    with ProcessPoolExecutor(args.workers) as executor:
+        await measure(
+            "процессы", render_in_executor(groups, executor, args.batch_size)
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    """Получение параметров запуска."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=3000)
+    parser.add_argument("--lectures-per-day", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=100)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,117 @@
+"""Сравнение разбиения расписания на сообщения со старым способом.
+
+Запуск:
+
+    PYTHONPATH=chsu_bot python benchmarks/bench_paginate.py --days 31
+
+Для каждой нагрузки выводится время сборки сообщений, длина самого
+длинного сообщения и общее число символов. Старый способ повторяет
+ScheduleService.add_schedule и fined_double_breaks до перехода
+на schedule.paginate.
+"""
+
+import argparse
+import datetime
+from itertools import chain
+import statistics
+import time
+from typing import Callable
+
+from fake_api import FakeTimetable
+from schedule import MESSAGE_LIMIT, paginate, Schedule
+
+
+def fined_double_breaks(schedule: str) -> list[int]:
+    """Поиск индексов двойных переносов строк старым способом."""
+    breakers = []
+    for i in range(1, len(schedule)):
+        if schedule[i - 1 : i + 1] == "\n\n" and schedule[i - 2] != "*":
+            breakers.append(i)
+    return breakers
+
+
+def add_schedule(
+    schedule: list[dict], message: str, messages: list[str]
+) -> str:
+    """Добавление расписания на день старым способом."""
+    day_schedule = Schedule().render(schedule)
+    if len(message + day_schedule) < MESSAGE_LIMIT:
+        return message + day_schedule
+    if len(day_schedule) >= MESSAGE_LIMIT:
+        double_breaks = fined_double_breaks(day_schedule)
+        half = double_breaks[len(double_breaks) // 2]
+        if len(message) != 0:
+            messages.append(message)
+        messages.append(day_schedule[:half])
+        return day_schedule[half:]
+    messages.append(message)
+    return ""
+
+
+def build_old(days: list[list[dict]]) -> list[str]:
+    """Сборка сообщений старым способом."""
+    messages: list[str] = []
+    message = ""
+    for schedule in days:
+        message = add_schedule(schedule, message, messages)
+    if message != "":
+        messages.append(message)
+    return messages
+
+
+def build_new(days: list[list[dict]]) -> list[str]:
+    """Сборка сообщений через schedule.paginate."""
+    schedule = Schedule()
+    return list(
+        paginate(chain.from_iterable(map(schedule.render_blocks, days)))
+    )
+
+
+def get_days(lectures_per_day: int, days: int) -> list[list[dict]]:
+    """Получение расписания одной группы, разбитого по дням."""
+    timetable = FakeTimetable(3, lectures_per_day, shared_share=0.5)
+    start = datetime.date(2024, 2, 1)
+    dates = [
+        (start + datetime.timedelta(days=i)).strftime("%d.%m.%Y")
+        for i in range(days)
+    ]
+    return [timetable.get_group_events(date, 1000) for date in dates]
+
+
+def measure(build: Callable, days: list[list[dict]], repeat: int) -> str:
+    """Замер времени сборки и описание результата."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        messages = build(days)
+        timings.append(time.perf_counter() - start)
+    return (
+        f"{statistics.median(timings) * 1000:8.2f} мс, "
+        f"макс. длина {max(map(len, messages)):6}, "
+        f"символов {sum(map(len, messages)):7}"
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    """Получение параметров запуска."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument(
+        "--lectures-per-day", type=int, nargs="+", default=[8, 50, 200, 400]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Запуск сравнения."""
+    args = parse_args()
+    for lectures_per_day in args.lectures_per_day:
+        days = get_days(lectures_per_day, args.days)
+        print(f"{lectures_per_day} пар в день, {args.days} дней")
+        print(f"  старый: {measure(build_old, days, args.repeat)}")
+        print(f"  новый:  {measure(build_new, days, args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Замер задержки чтений из БД во время обновления расписания.
+
+Запуск:
+
+    PYTHONPATH=chsu_bot python benchmarks/bench_read_latency.py --readers 4
+
+Расписание всех групп создаётся локальной заменой API ЧГУ и один раз
+отрисовывается заранее. Затем в БД-файл записывается обновление так
+же, как это делает Reloader: Lectures.replace_schedule
+и Groups.update_groups_schedule. Параллельно несколько сопрограмм
+читают расписание случайных групп, как обработчики бота. Замер
+выполняется без пула чтения (все запросы через одно соединение,
+как до перехода на WAL) и с пулом из readers соединений.
+"""
+
+import argparse
+import asyncio
+import datetime
+from pathlib import Path
+import random
+import statistics
+import tempfile
+import time
+
+from db import Groups, Lectures, Migrations, Storage
+from fake_api import FakeTimetable
+from schedule import Schedule
+from update_schedule import render_batch
+
+Reload = tuple[dict[int, dict[str, list[dict]]], list[str], list[list]]
+
+
+def prepare_reload(args: argparse.Namespace) -> Reload:
+    """Создание и отрисовка расписания всех групп."""
+    timetable = FakeTimetable(args.groups, args.lectures_per_day)
+    today = datetime.date.today()
+    dates = [
+        (today + datetime.timedelta(days=i)).strftime("%d.%m.%Y")
+        for i in range(args.days)
+    ]
+    collected = {group["id"]: {} for group in timetable.groups}
+    for date in dates:
+        for lecture in timetable.get_events(date):
+            for group in lecture["groups"]:
+                collected[group["id"]].setdefault(date, []).append(lecture)
+    rendered = render_batch(
+        Schedule(),
+        [
+            (group_id, days.get(dates[0], []), days.get(dates[1], []), None)
+            for group_id, days in collected.items()
+        ],
+    )
+    schedules = [[*texts, group_id] for group_id, _, texts in rendered]
+    return collected, dates, schedules
+
+
+async def read_loop(
+    groups: Groups,
+    lectures: Lectures,
+    ids: list[int],
+    dates: list[str],
+    latencies: list[float],
+) -> None:
+    """Чтение расписания случайных групп до отмены."""
+    rnd = random.Random()
+    while True:
+        group_id = rnd.choice(ids)
+        started = time.perf_counter()
+        await groups.td_schedule(group_id)
+        await lectures.get_schedule(group_id, dates[2], dates[-1])
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.001)
+
+
+async def measure(
+    path: Path, readers: int, reload: Reload, clients: int
+) -> tuple[float, list[float]]:
+    """Замер задержек чтения во время одного обновления."""
+    collected, dates, schedules = reload
+    async with Storage(str(path), readers) as storage:
+        await Migrations(storage.writer).apply()
+        groups, lectures = Groups(storage), Lectures(storage)
+        await groups.refresh_groups(
+            [(group_id, str(group_id)) for group_id in collected]
+        )
+        await lectures.replace_schedule(collected, dates)
+        await groups.update_groups_schedule(schedules)
+        latencies: list[float] = []
+        tasks = [
+            asyncio.create_task(
+                read_loop(groups, lectures, list(collected), dates, latencies)
+            )
+            for _ in range(clients)
+        ]
+        await asyncio.sleep(0.5)
+        latencies.clear()
+        started = time.perf_counter()
+        await lectures.replace_schedule(collected, dates)
+        await groups.update_groups_schedule(schedules)
+        elapsed = time.perf_counter() - started
+        reads = latencies.copy()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return elapsed, reads
+
+
+def describe(latencies: list[float]) -> str:
+    """Описание распределения задержек в миллисекундах."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return "нет чтений"
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"чтений {len(ordered)}, "
+        f"p50 {statistics.median(ordered) * 1000:.1f} мс, "
+        f"p99 {p99 * 1000:.1f} мс, "
+        f"макс. {ordered[-1] * 1000:.1f} мс"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Сравнение одного соединения и пула чтения."""
+    reload = prepare_reload(args)
+    with tempfile.TemporaryDirectory() as directory:
+        for readers in (0, args.readers):
+            path = Path(directory) / f"bench-{readers}.db"
+            elapsed, latencies = await measure(
+                path, readers, reload, args.clients
+            )
+            print(
+                f"пул чтения {readers}: обновление {elapsed:.2f} с, "
+                f"{describe(latencies)}"
+            )
+
+
+def parse_args() -> argparse.Namespace:
+    """Получение параметров запуска."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--groups", type=int, default=600)
+    parser.add_argument("--lectures-per-day", type=int, default=5)
+    parser.add_argument("--days", type=int, default=14)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
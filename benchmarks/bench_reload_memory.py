@@ -0,0 +1,183 @@
+"""Сравнение памяти при загрузке расписания всех групп.
+
+Запуск:
+
+    PYTHONPATH=chsu_bot python benchmarks/bench_reload_memory.py --days 14
+
+Скрипт поднимает локальную замену API ЧГУ в отдельном процессе и
+загружает расписание всех групп за days дней двумя способами, каждый
+в своём процессе: старым (resp.json() и раскладка готового списка
+по группам и датам) и потоковым (ChsuAPI.get_all_groups_schedule).
+Для каждого выводится прирост пикового RSS относительно процесса
+до запроса, RSS после загрузки и время загрузки.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+from pathlib import Path
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+from parse import ChsuAPI
+
+FAKE_API = Path(__file__).resolve().parents[1] / "chsu_bot" / "fake_api.py"
+PAGE_SIZE = resource.getpagesize()
+
+
+def get_rss() -> int:
+    """Получение текущего RSS процесса в мегабайтах."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE // 2**20
+
+
+def get_peak_rss() -> int:
+    """Получение пикового RSS процесса в мегабайтах."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def collect_schedule_by_ids_and_dates(schedule: list[dict]) -> dict:
+    """Фасовка пар по группам и датам старым способом."""
+    collected_schedule = {}
+    for lecture in schedule:
+        for group in lecture["groups"]:
+            days = collected_schedule.setdefault(group["id"], {})
+            days.setdefault(lecture["dateEvent"], []).append(lecture)
+    return collected_schedule
+
+
+async def read_whole(resp: aiohttp.ClientResponse) -> dict:
+    """Чтение ответа целиком, как до потокового разбора."""
+    return collect_schedule_by_ids_and_dates(await resp.json())
+
+
+async def load(url: str, days: int, mode: str) -> dict:
+    """Загрузка расписания всех групп выбранным способом."""
+    session = aiohttp.ClientSession()
+    async with ChsuAPI(session, url) as api:
+        await api.update_token()
+        rss_before = get_rss()
+        started = time.perf_counter()
+        if mode == "old":
+            today = datetime.datetime.now()
+            last_day = today + datetime.timedelta(days=days - 1)
+            schedule = await api.fetch(
+                "timetable/v1/event/from/{}/to/{}/".format(
+                    today.strftime("%d.%m.%Y"), last_day.strftime("%d.%m.%Y")
+                ),
+                read_whole,
+                bulk=True,
+            )
+        else:
+            schedule = await api.get_all_groups_schedule(days)
+        return {
+            "seconds": time.perf_counter() - started,
+            "peak": get_peak_rss() - rss_before,
+            "retained": get_rss() - rss_before,
+            "groups": len(schedule),
+        }
+
+
+def check_port(port: int) -> None:
+    """Проверка того, что порт не занят другим сервером."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", port))
+
+
+def wait_for_server(
+    server: subprocess.Popen, port: int, timeout: float = 30
+) -> None:
+    """Ожидание запуска локального сервера."""
+    deadline = time.monotonic() + timeout
+    while server.poll() is None and time.monotonic() < deadline:
+        with contextlib.suppress(OSError):
+            socket.create_connection(("127.0.0.1", port), 1).close()
+            return
+        time.sleep(0.1)
+    raise RuntimeError("Локальная замена API не запустилась")
+
+
+def run_mode(args: argparse.Namespace, mode: str) -> dict:
+    """Запуск загрузки в отдельном процессе."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--mode",
+            mode,
+            "--port",
+            str(args.port),
+            "--days",
+            str(args.days),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def compare(args: argparse.Namespace) -> None:
+    """Запуск сервера и сравнение двух способов."""
+    check_port(args.port)
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            str(FAKE_API),
+            "--port",
+            str(args.port),
+            "--groups",
+            str(args.groups),
+            "--lectures-per-day",
+            str(args.lectures_per_day),
+            "--padding",
+            str(args.padding),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(server, args.port)
+        run_mode(args, "new")
+        for mode in ("old", "new"):
+            result = run_mode(args, mode)
+            print(
+                f"{mode:>3}: пик +{result['peak']} МБ, "
+                f"после загрузки +{result['retained']} МБ, "
+                f"{result['seconds']:.2f} с, групп {result['groups']}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def parse_args() -> argparse.Namespace:
+    """Получение параметров запуска."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["old", "new"])
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--groups", type=int, default=600)
+    parser.add_argument("--lectures-per-day", type=int, default=5)
+    parser.add_argument("--padding", type=int, default=200)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Запуск замера."""
+    args = parse_args()
+    if args.mode is None:
+        compare(args)
+        return
+    url = f"http://127.0.0.1:{args.port}/api/"
+    print(json.dumps(asyncio.run(load(url, args.days, args.mode))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Сравнение отрисовки расписания со старым способом.
+
+Запуск:
+
+    PYTHONPATH=chsu_bot python benchmarks/bench_render.py --groups 5000
+
+Расписание всех групп на два дня создаётся локальной заменой API ЧГУ
+при разных долях общих пар потока. Старый способ повторяет
+Schedule.render до перехода на склейку фрагментов: строка растёт
+через +=, а день недели берётся через strftime("%A"). Новый способ
+отрисовывает все группы одним Schedule и очищает запомненные
+фрагменты в конце, как Reloader.
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+from typing import Callable
+
+from fake_api import FakeTimetable
+from schedule import Schedule
+
+WEEK_DAYS = {
+    "Sunday": "воскресенье",
+    "Monday": "понедельник",
+    "Tuesday": "вторник",
+    "Wednesday": "среда",
+    "Thursday": "четверг",
+    "Friday": "пятница",
+    "Saturday": "суббота",
+}
+
+
+def render_old(unparse_schedule: list[dict]) -> str:
+    """Создание расписания в текстовом виде старым способом."""
+    schedule = ""
+    if unparse_schedule != []:
+        for i in range(len(unparse_schedule)):
+            if i == 0:
+                date = unparse_schedule[i]["dateEvent"]
+                schedule += (
+                    f"*Расписание на {date} - {get_week_day_old(date)}*\n\n"
+                )
+            schedule += Schedule.get_duration_lesson(unparse_schedule[i])
+            schedule += Schedule.get_lesson_and_type(unparse_schedule[i])
+            schedule += get_lecture_old(unparse_schedule[i])
+            schedule += get_auditory_old(unparse_schedule[i])
+        return schedule
+    return "Расписание не найдено"
+
+
+def get_lecture_old(lecture: dict) -> str:
+    """Получение преподавателей старым способом."""
+    lecturers = []
+    for lecturer in lecture["lecturers"]:
+        lecturers.append(lecturer["shortName"])
+    return f"🧑 {', '.join(lecturers)}\n"
+
+
+def get_auditory_old(lecture: dict) -> str:
+    """Получение номера аудитории старым способом."""
+    if lecture["onlineEvent"] is not None:
+        return "🏢 Онлайн\n\n"
+    elif lecture["auditory"] is None:
+        return "🏢 -/-\n\n"
+    elif lecture["build"] is None:
+        return f"🏢 {lecture['auditory']['title']}"
+    return (
+        f"🏢 {lecture['auditory']['title']}, "
+        f"{lecture['build']['title'].lower()}\n\n"
+    )
+
+
+def get_week_day_old(date: str) -> str:
+    """Получение названия дня недели через strftime."""
+    day, month, year = map(int, date.split("."))
+    return WEEK_DAYS[
+        datetime.date(year=year, month=month, day=day).strftime("%A")
+    ]
+
+
+def build_old(days: list[list[dict]]) -> int:
+    """Отрисовка всех дней старым способом."""
+    return sum(len(render_old(day)) for day in days)
+
+
+def build_new(days: list[list[dict]]) -> int:
+    """Отрисовка всех дней одним Schedule."""
+    schedule = Schedule()
+    try:
+        return sum(len(schedule.render(day)) for day in days)
+    finally:
+        schedule.clear_fragments()
+
+
+def get_days(
+    groups: int, lectures_per_day: int, shared_share: float
+) -> list[list[dict]]:
+    """Получение расписания всех групп на два рабочих дня."""
+    timetable = FakeTimetable(groups, lectures_per_day, shared_share)
+    dates = ["05.02.2024", "06.02.2024"]
+    return [
+        timetable.get_group_events(date, group["id"])
+        for group in timetable.groups
+        for date in dates
+    ]
+
+
+def measure(build: Callable, days: list[list[dict]], repeat: int) -> str:
+    """Замер времени отрисовки."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        length = build(days)
+        timings.append(time.perf_counter() - start)
+    return f"{statistics.median(timings) * 1000:8.1f} мс, символов {length}"
+
+
+def parse_args() -> argparse.Namespace:
+    """Получение параметров запуска."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=5000)
+    parser.add_argument("--lectures-per-day", type=int, default=4)
+    parser.add_argument(
+        "--shared-share", type=float, nargs="+", default=[0, 0.3, 0.6, 0.9]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Запуск сравнения."""
+    args = parse_args()
+    for shared_share in args.shared_share:
+        days = get_days(args.groups, args.lectures_per_day, shared_share)
+        print(
+            f"{args.groups} групп, {len(days)} дней, "
+            f"доля общих пар {shared_share:.0%}"
+        )
+        print(f"  старый: {measure(build_old, days, args.repeat)}")
+        print(f"  новый:  {measure(build_new, days, args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
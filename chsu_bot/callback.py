@@ -0,0 +1,72 @@
+"""Модуль формата данных inline-кнопок.
+
+Данные кнопки имеют вид "<версия><префикс>:<поле>:<поле>...", например
+"1g:1234". Ключ до первого разделителя однозначно определяет тип
+кнопки, поэтому обработчик находится по нему одним обращением
+к словарю, а кнопки старых версий отбрасываются, не доходя
+до разбора полей.
+"""
+
+from datetime import datetime
+from typing import Callable
+
+VERSION = "1"
+SEPARATOR = ":"
+
+
+def date_field(value: str) -> str:
+    """Проверка поля с датой в формате дд.мм.гггг."""
+    datetime.strptime(value, "%d.%m.%Y")
+    return value
+
+
+def month_field(value: str) -> int:
+    """Проверка поля с номером месяца."""
+    month = int(value)
+    if not 1 <= month <= 12:
+        raise ValueError(f"Неверный номер месяца: {month}")
+    return month
+
+
+def get_key(data: str) -> str:
+    """Получение ключа типа кнопки из её данных."""
+    return data.partition(SEPARATOR)[0]
+
+
+class CallbackData:
+    """Класс типа данных inline-кнопки."""
+
+    def __init__(self, prefix: str, *fields: Callable[[str], object]) -> None:
+        self.key = f"{VERSION}{prefix}"
+        self.fields = fields
+
+    def new(self, *values: object) -> str:
+        """Создание данных кнопки."""
+        return SEPARATOR.join((self.key, *map(str, values)))
+
+    def parse(self, data: str) -> tuple | None:
+        """Разбор данных кнопки.
+
+        Если число полей не совпадает или поле не разбирается,
+        возвращается None.
+        """
+        values = data.split(SEPARATOR)[1:]
+        if len(values) != len(self.fields):
+            return None
+        try:
+            return tuple(
+                field(value) for field, value in zip(self.fields, values)
+            )
+        except ValueError:
+            return None
+
+
+NOOP = CallbackData("n")
+DAY = CallbackData("d", date_field)
+MONTH = CallbackData("m", month_field, int)
+CLOSE_CALENDAR = CallbackData("x")
+INSTITUTE = CallbackData("i", str)
+CLOSE_INSTITUTES = CallbackData("c")
+GROUP_PAGE = CallbackData("p", str, int)
+GROUP = CallbackData("g", int)
+BACK_TO_INSTITUTES = CallbackData("b")
@@ -10,6 +10,47 @@ class Config(BaseSettings):
     BOTTOKEN: str
     RUNTYPE: str
     DBURL: str
+    DB_READERS: int = 4
+    USERS_BATCH_SIZE: int = 100
+    USERS_FLUSH_INTERVAL: float = 0.05
+    USERS_CACHE_SIZE: int = 10000
+    FSM_TTL: int = 86400
+    FSM_CACHE_SIZE: int = 10000
+    FSM_FLUSH_INTERVAL: float = 0.05
+    THROTTLE_RATE: float = 1
+    THROTTLE_BURST: float = 5
+    THROTTLE_GLOBAL_RATE: float | None = None
+    THROTTLE_GLOBAL_BURST: float = 100
+    THROTTLE_LIMITS: dict[str, tuple[float, float]] = {"1m": (3, 10)}
+    THROTTLE_IDLE: float = 600
+    THROTTLE_MAX_BUCKETS: int = 100000
+    SEND_RATE: float = 30
+    SEND_BURST: float = 1
+    SEND_CHAT_RATE: float = 1
+    SEND_CHAT_BURST: float = 3
+    STATS_INTERVAL: float = 300
     DOMEN: str = "127.0.0.1"
     HOST: str = "0.0.0.0"
     PORT: int = 8080
+    SCHEDULE_CACHE_SIZE: int = 20000
+    SCHEDULE_CACHE_TTL: int = 1800
+    SCHEDULE_HORIZON: int = 14
+    RENDER_EXECUTOR: str = "thread"
+    RENDER_WORKERS: int = 2
+    RENDER_BATCH_SIZE: int = 100
+    TOKEN_LIFETIME: int = 3600
+    TOKEN_REFRESH_MARGIN: int = 60
+    API_URL: str = "http://api.chsu.ru/api/"
+    API_TIMEOUT: float = 10
+    API_CONNECT_TIMEOUT: float = 5
+    API_READ_TIMEOUT: float = 10
+    API_BULK_TIMEOUT: float = 300
+    API_LIMIT_PER_HOST: int = 20
+    API_KEEPALIVE_TIMEOUT: float = 30
+    API_DNS_CACHE_TTL: int = 300
+    API_COMPRESS: bool = True
+    API_RETRIES: int = 3
+    API_BACKOFF_BASE: float = 0.5
+    API_BACKOFF_MAX: float = 8
+    API_BREAKER_THRESHOLD: int = 5
+    API_BREAKER_RESET_TIMEOUT: float = 30
@@ -1,40 +1,327 @@
 """Модуль для взаимодействия с БД."""
 
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import json
+from pathlib import Path
+from types import EllipsisType
+from typing import AsyncIterator
+
 import aiosqlite
+from utils import from_iso, to_iso
 
 
-class Groups:
-    """Класс для создания и управления таблицей групп."""
+class Storage:
+    """Класс соединений с БД: одного для записи и пула для чтения.
+
+    БД работает в режиме WAL, поэтому чтения из пула идут параллельно
+    записи и не ждут окончания больших транзакций обновления
+    расписания. БД в памяти не разделяется между соединениями,
+    и для неё чтения идут через соединение записи. Все изменения
+    выполняются через transaction.
+    """
+
+    writer_pragmas = (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "busy_timeout=5000",
+        "temp_store=MEMORY",
+    )
+    reader_pragmas = ("query_only=ON", "busy_timeout=5000")
+
+    def __init__(self, url: str, readers: int = 4) -> None:
+        self.url = url
+        self.size = 0 if url == ":memory:" else readers
+        self.writer: aiosqlite.Connection | None = None
+        self.write_lock = asyncio.Lock()
+        self.readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self.connections: list[aiosqlite.Connection] = []
+
+    async def __aenter__(self) -> "Storage":
+        """Открытие соединений при входе в контекст."""
+        await self.connect_all()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Закрытие соединений при выходе из контекста."""
+        await self.close()
+
+    @staticmethod
+    async def connect(
+        database: str, pragmas: tuple[str, ...], uri: bool = False
+    ) -> aiosqlite.Connection:
+        """Открытие соединения с настройками."""
+        conn = await aiosqlite.connect(database, uri=uri)
+        for pragma in pragmas:
+            await conn.execute(f"PRAGMA {pragma}")
+        return conn
+
+    async def connect_all(self) -> None:
+        """Открытие соединения для записи и пула для чтения."""
+        self.writer = await self.connect(self.url, self.writer_pragmas)
+        reader_url = f"{Path(self.url).absolute().as_uri()}?mode=ro"
+        for _ in range(self.size):
+            conn = await self.connect(
+                reader_url, self.reader_pragmas, uri=True
+            )
+            self.connections.append(conn)
+            self.readers.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Закрытие всех соединений."""
+        for conn in self.connections:
+            await conn.close()
+        self.connections.clear()
+        if self.writer is not None:
+            await self.writer.close()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Выполнение изменений одной транзакцией.
+
+        Соединение записи общее, поэтому транзакции идут по очереди
+        под блокировкой: иначе commit или rollback одной сопрограммы
+        завершал бы чужие незаконченные изменения. Если внутри
+        возникла ошибка, изменения откатываются.
+        """
+        async with self.write_lock:
+            try:
+                yield self.writer
+            except BaseException:
+                await self.writer.rollback()
+                raise
+            await self.writer.commit()
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Получение соединения для чтения из пула."""
+        if not self.connections:
+            yield self.writer
+            return
+        conn = await self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put_nowait(conn)
+
+
+class Migrations:
+    """Класс версионных миграций схемы БД.
+
+    Номер применённой миграции хранится в PRAGMA user_version.
+    Каждая миграция выполняется в отдельной транзакции вместе
+    с изменением номера версии.
+    """
+
+    scripts = (
+        # 1: исходная схема без ключей и индексов.
+        """
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER,
+            name TEXT,
+            td_schedule TEXT,
+            tm_schedule TEXT
+        );
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER,
+            groupId INTEGER
+        );
+        """,
+        # 2: первичные ключи, удаление дублей, индекс по названию группы.
+        """
+        CREATE TABLE groups_new (
+            id INTEGER PRIMARY KEY,
+            name TEXT COLLATE NOCASE,
+            td_schedule TEXT,
+            tm_schedule TEXT
+        );
+        INSERT INTO groups_new (id, name, td_schedule, tm_schedule)
+        SELECT id, name, td_schedule, tm_schedule FROM groups
+        WHERE rowid IN (
+            SELECT MAX(rowid) FROM groups
+            WHERE id IS NOT NULL
+            GROUP BY id
+        );
+        DROP TABLE groups;
+        ALTER TABLE groups_new RENAME TO groups;
+        CREATE INDEX groups_name ON groups (name);
+
+        CREATE TABLE users_new (
+            id INTEGER PRIMARY KEY,
+            groupId INTEGER
+        );
+        INSERT INTO users_new (id, groupId)
+        SELECT id, groupId FROM users AS u
+        WHERE rowid = (
+            SELECT rowid FROM users
+            WHERE id = u.id
+            ORDER BY groupId IS NULL, rowid DESC
+            LIMIT 1
+        );
+        DROP TABLE users;
+        ALTER TABLE users_new RENAME TO users;
+        """,
+        # 3: состояния FSM пользователей.
+        """
+        CREATE TABLE fsm (
+            chat_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            state TEXT,
+            data TEXT NOT NULL,
+            updated REAL NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX fsm_updated ON fsm (updated);
+        """,
+        # 4: нормализованное хранилище пар. Таблицы могли быть
+        # созданы до перехода на миграции, поэтому IF NOT EXISTS.
+        """
+        CREATE TABLE IF NOT EXISTS disciplines (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS lecturers (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS auditories (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS builds (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS lectures (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            start_time TEXT,
+            end_time TEXT,
+            lesson_type TEXT,
+            discipline_id INTEGER REFERENCES disciplines (id),
+            auditory_id INTEGER REFERENCES auditories (id),
+            build_id INTEGER REFERENCES builds (id),
+            online_event TEXT
+        );
+        CREATE TABLE IF NOT EXISTS lecture_groups (
+            group_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            lecture_id INTEGER NOT NULL REFERENCES lectures (id),
+            PRIMARY KEY (group_id, date, position)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS lecture_lecturers (
+            lecture_id INTEGER NOT NULL REFERENCES lectures (id),
+            position INTEGER NOT NULL,
+            lecturer_id INTEGER NOT NULL REFERENCES lecturers (id),
+            PRIMARY KEY (lecture_id, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS lectures_date ON lectures (date);
+        CREATE INDEX IF NOT EXISTS lectures_auditory
+            ON lectures (auditory_id, date);
+        CREATE INDEX IF NOT EXISTS lecture_lecturers_lecturer
+            ON lecture_lecturers (lecturer_id, lecture_id);
+        """,
+    )
 
     def __init__(self, conn: aiosqlite.Connection) -> None:
         self.conn = conn
 
-    async def create_table(self) -> None:
-        """Создание таблицы для групп."""
-        await self.conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS groups (
-                id INTEGER,
-                name TEXT,
-                td_schedule TEXT,
-                tm_schedule TEXT
-            )
-            """
-        )
-        await self.conn.commit()
+    async def get_version(self) -> int:
+        """Получение номера применённой миграции."""
+        async with self.conn.execute("PRAGMA user_version") as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def apply(self) -> None:
+        """Применение недостающих миграций к БД."""
+        version = await self.get_version()
+        for number, script in enumerate(
+            self.scripts[version:], start=version + 1
+        ):
+            try:
+                await self.conn.executescript(
+                    f"BEGIN;{script}PRAGMA user_version = {number};COMMIT;"
+                )
+            except aiosqlite.Error:
+                await self.conn.rollback()
+                raise
 
-    async def add_group_ids(
+
+class Groups:
+    """Класс для создания и управления таблицей групп.
+
+    Названия и ID групп дополнительно хранятся в памяти списком,
+    отсортированным по названию, из которого строятся страницы
+    клавиатуры групп. При каждом обновлении групп список
+    заменяется новым.
+    """
+
+    def __init__(self, storage: Storage) -> None:
+        self.storage = storage
+        self.index: list[tuple[str, int]] = []
+
+    async def refresh_groups(
         self, ids_and_groupnames: list[tuple[int, str]]
-    ) -> None:
-        """Добавление групп в БД."""
-        await self.conn.execute("DELETE FROM groups")
-        await self.conn.executemany(
+    ) -> tuple[list[int], list[int], list[int]]:
+        """Обновление списка групп в БД.
+
+        Новый список сравнивается с сохранённым, и одной транзакцией
+        добавляются новые группы, переименовываются изменившиеся
+        и удаляются пропавшие, а у пользователей пропавших групп
+        группа сбрасывается. Расписание остальных групп
+        не затрагивается. Возвращаются ID добавленных,
+        переименованных и удалённых групп.
+        """
+        async with self.storage.reader() as conn, conn.execute(
+            "SELECT id, name FROM groups"
+        ) as cursor:
+            stored = dict(await cursor.fetchall())
+        incoming = dict(ids_and_groupnames)
+        added = [group_id for group_id in incoming if group_id not in stored]
+        renamed = [
+            group_id
+            for group_id, name in incoming.items()
+            if group_id in stored and stored[group_id] != name
+        ]
+        removed = [group_id for group_id in stored if group_id not in incoming]
+        if not (added or renamed or removed):
+            return added, renamed, removed
+        async with self.storage.transaction() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO groups (id, name) VALUES (?, ?)
+                ON CONFLICT (id) DO UPDATE SET name=excluded.name
+                """,
+                [
+                    (group_id, incoming[group_id])
+                    for group_id in added + renamed
+                ],
+            )
+            await conn.executemany(
+                """
+                DELETE FROM groups WHERE id=?
+                """,
+                [(group_id,) for group_id in removed],
+            )
+            await conn.executemany(
+                """
+                UPDATE users SET groupId=NULL WHERE groupId=?
+                """,
+                [(group_id,) for group_id in removed],
+            )
+        await self.load_index()
+        return added, renamed, removed
+
+    async def load_index(self) -> None:
+        """Загрузка списка групп, отсортированного по названию."""
+        async with self.storage.reader() as conn, conn.execute(
             """
-            INSERT INTO groups (id, name) VALUES (?, ?)
-            """,
-            ids_and_groupnames,
-        )
-        await self.conn.commit()
+            SELECT name, id FROM groups
+            WHERE name IS NOT NULL
+            """
+        ) as cursor:
+            self.index = sorted(map(tuple, await cursor.fetchall()))
 
     async def unused_id(self, used_ids: list[int]) -> list[int]:
         """Получение ID групп, расписания для которых не было найдено."""
@@ -43,7 +330,7 @@ class Groups:
         for used_id in used_ids:
             ids[used_id] = ...
 
-        async with self.conn.execute(
+        async with self.storage.reader() as conn, conn.execute(
             """
             SELECT id FROM groups
             """
@@ -57,149 +344,436 @@ class Groups:
     async def update_groups_schedule(
         self, schedules: list[tuple[str, str, int]]
     ) -> None:
-        """Обновление расписания в БД."""
-        await self.conn.executemany(
-            """
-            UPDATE groups SET td_schedule=?, tm_schedule=?
-            WHERE id=?
-            """,
-            schedules,
-        )
+        """Обновление расписания в БД.
+
+        Расписание на каждый день хранится как JSON-список
+        готовых к отправке сообщений.
+        """
+        async with self.storage.transaction() as conn:
+            await conn.executemany(
+                """
+                UPDATE groups SET td_schedule=?, tm_schedule=?
+                WHERE id=?
+                """,
+                schedules,
+            )
+
+    @staticmethod
+    def load_messages(schedule: str | None) -> list[str]:
+        """Получение списка сообщений из сохранённого расписания.
+
+        Расписание, сохранённое до перехода на JSON, отдаётся
+        одним сообщением.
+        """
+        if not schedule:
+            return []
+        try:
+            return json.loads(schedule)
+        except json.JSONDecodeError:
+            return [schedule]
 
-        await self.conn.commit()
+    async def td_schedule(self, group_id: int) -> list[str]:
+        """Получение сообщений с расписанием на сегодня.
 
-    async def td_schedule(self, group_id: int) -> str:
-        """Получение расписания на сегодня."""
-        async with self.conn.execute(
+        Для группы, удалённой при обновлении, возвращается
+        пустой список.
+        """
+        async with self.storage.reader() as conn, conn.execute(
             """
             SELECT td_schedule FROM groups
             WHERE id=?
             """,
             (group_id,),
         ) as cursor:
-            return (await cursor.fetchone())[0]
+            row = await cursor.fetchone()
+        return self.load_messages(row[0] if row else None)
+
+    async def tm_schedule(self, group_id: int) -> list[str]:
+        """Получение сообщений с расписанием на завтра.
 
-    async def tm_schedule(self, group_id: int) -> str:
-        """Получение расписания на завтра."""
-        async with self.conn.execute(
+        Для группы, удалённой при обновлении, возвращается
+        пустой список.
+        """
+        async with self.storage.reader() as conn, conn.execute(
             """
             SELECT tm_schedule FROM groups
             WHERE id=?
             """,
             (group_id,),
         ) as cursor:
-            return (await cursor.fetchone())[0]
-
-    async def get_groups_by_first_symbol(
-        self, symbol: str
-    ) -> list[tuple[int, str]]:
-        """Получение групп, имена которых начинаются с переданного символа."""
-        async with self.conn.execute(
-            """
-            SELECT name, id FROM groups
-            WHERE name LIKE ?||'%'
-            """,
-            (symbol,),
-        ) as cursor:
-            return await cursor.fetchall()
+            row = await cursor.fetchone()
+        return self.load_messages(row[0] if row else None)
 
 
 class Users:
-    """Класс для создания и управления таблицы пользователей."""
+    """Класс для создания и управления таблицы пользователей.
 
-    def __init__(self, conn: aiosqlite.Connection) -> None:
-        self.conn = conn
+    Записи копятся в памяти и сбрасываются в БД одной транзакцией,
+    когда набирается batch_size изменений или проходит flush_interval
+    секунд. Пока изменения не записаны, чтения для этого пользователя
+    отвечают из них. Группы пользователей, полученные через
+    get_profile, хранятся в LRU-кэше на cache_size записей.
+    """
 
-    async def create_table(self) -> None:
-        """Создание таблицы users."""
-        await self.conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER,
-                groupId INTEGER
-            )
-            """
-        )
+    def __init__(
+        self,
+        storage: Storage,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        cache_size: int = 10000,
+    ) -> None:
+        self.storage = storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.added: set[int] = set()
+        self.groups: dict[int, int | None] = {}
+        self.flushing: dict[int, int | None] = {}
+        self.flush_lock = asyncio.Lock()
+        self.flush_task: asyncio.Task | None = None
+        self.cache_size = cache_size
+        self.profiles: OrderedDict[int, int | None] = OrderedDict()
+
+    def pending_group(self, user_id: int) -> int | None | EllipsisType:
+        """Получение ещё не записанной группы пользователя.
 
-        await self.conn.commit()
+        Если группа пользователя не менялась, возвращается Ellipsis.
+        """
+        return self.groups.get(user_id, self.flushing.get(user_id, ...))
 
-    async def in_db(self, user_id: int) -> bool:
-        """Проверка наличия пользователя в БД."""
-        async with self.conn.execute(
+    async def schedule_flush(self) -> None:
+        """Запись изменений сразу или после flush_interval."""
+        if len(self.added) + len(self.groups) >= self.batch_size:
+            await self.flush()
+        elif self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self) -> None:
+        """Запись изменений после flush_interval."""
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Запись накопленных изменений одной транзакцией.
+
+        Если запись не удалась или была отменена, изменения
+        возвращаются в очередь и будут записаны следующим сбросом.
+        """
+        async with self.flush_lock:
+            if not (self.added or self.groups):
+                return
+            added, groups = self.added, self.groups
+            self.flushing = groups
+            self.added, self.groups = set(), {}
+            try:
+                async with self.storage.transaction() as conn:
+                    await conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO users (id) VALUES (?)
+                        """,
+                        [(user_id,) for user_id in added],
+                    )
+                    await conn.executemany(
+                        """
+                        INSERT INTO users (id, groupId) VALUES (?, ?)
+                        ON CONFLICT (id) DO UPDATE
+                        SET groupId=excluded.groupId
+                        """,
+                        groups.items(),
+                    )
+            except BaseException:
+                self.added |= added
+                self.groups = groups | self.groups
+                raise
+            finally:
+                self.flushing = {}
+
+    async def close(self) -> None:
+        """Запись оставшихся изменений перед завершением работы.
+
+        Отложенный сброс отменяется и дожидается возврата своих
+        изменений в очередь, после чего всё пишется одной транзакцией.
+        """
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            await asyncio.gather(self.flush_task, return_exceptions=True)
+        await self.flush()
+
+    async def get_profile(self, user_id: int) -> int | None:
+        """Получение группы пользователя с добавлением нового."""
+        if user_id not in self.profiles:
+            self.profiles[user_id] = await self.fetch_profile(user_id)
+            if len(self.profiles) > self.cache_size:
+                self.profiles.popitem(last=False)
+        self.profiles.move_to_end(user_id)
+        return self.profiles[user_id]
+
+    async def fetch_profile(self, user_id: int) -> int | None:
+        """Получение группы пользователя в обход кэша.
+
+        Группа берётся из незаписанных изменений, а если их нет,
+        из пула чтения. Пользователь, которого нет в БД, ставится
+        в очередь на добавление вместе с остальными изменениями.
+        """
+        row = None
+        if self.pending_group(user_id) is ...:
+            row = await self.select_group(user_id)
+        group_id = self.pending_group(user_id)
+        if group_id is not ...:
+            return group_id
+        if row is None:
+            await self.add_user(user_id)
+            return None
+        return row[0]
+
+    async def select_group(self, user_id: int) -> tuple[int | None] | None:
+        """Получение строки с группой пользователя из БД."""
+        async with self.storage.reader() as conn, conn.execute(
             """
-            SELECT * FROM users
+            SELECT groupId FROM users
             WHERE id=?
             """,
             (user_id,),
         ) as cursor:
-            user = await cursor.fetchone()
-            if user is None:
-                return False
-            return True
+            return await cursor.fetchone()
 
     async def add_user(self, user_id: int) -> None:
         """Добавление пользователя в БД."""
-        await self.conn.execute(
-            """
-            INSERT INTO users (id) VALUES (?)
-            """,
-            (user_id,),
-        )
-
-        await self.conn.commit()
+        self.added.add(user_id)
+        await self.schedule_flush()
 
     async def change_group(self, user_id: int, group_id: int) -> None:
         """Изменение группы пользователя."""
-        await self.conn.execute(
+        self.groups[user_id] = group_id
+        self.profiles.pop(user_id, None)
+        await self.schedule_flush()
+
+    async def delete_group(self, user_id: int) -> None:
+        """Удаление группы пользователя."""
+        self.groups[user_id] = None
+        self.profiles.pop(user_id, None)
+        await self.schedule_flush()
+
+
+class Lectures:
+    """Класс управления нормализованным хранилищем пар."""
+
+    lookup_tables = ("disciplines", "lecturers", "auditories", "builds")
+    columns = """
+        SELECT l.id, l.date, l.start_time, l.end_time, l.lesson_type,
+            (SELECT title FROM disciplines WHERE id = l.discipline_id),
+            (SELECT title FROM auditories WHERE id = l.auditory_id),
+            (SELECT title FROM builds WHERE id = l.build_id),
+            l.online_event
+    """
+
+    def __init__(self, storage: Storage) -> None:
+        self.storage = storage
+        self.dates: set[str] = set()
+
+    async def replace_schedule(
+        self, schedule: dict[int, dict[str, list[dict]]], dates: list[str]
+    ) -> None:
+        """Замена хранящихся пар расписанием на новый горизонт.
+
+        Замена выполняется одной транзакцией, а чтения из пула
+        в режиме WAL до её окончания видят старое расписание
+        целиком, поэтому старые даты действуют до фиксации.
+        Без пула чтения идут через соединение записи и могут
+        увидеть незаконченную замену, поэтому на это время
+        хранилище не отвечает ни за одну дату.
+        """
+        if not self.storage.connections:
+            self.dates = set()
+        lectures = {
+            lecture["id"]: lecture
+            for days in schedule.values()
+            for day in days.values()
+            for lecture in day
+        }
+        async with self.storage.transaction() as conn:
+            await self.insert_lectures(conn, schedule, lectures)
+        self.dates = set(dates)
+
+    async def insert_lectures(
+        self,
+        conn: aiosqlite.Connection,
+        schedule: dict[int, dict[str, list[dict]]],
+        lectures: dict[int, dict],
+    ) -> None:
+        """Замена строк всех таблиц пар внутри транзакции."""
+        ids = await self.add_lookups(conn, lectures.values())
+        await conn.execute("DELETE FROM lecture_lecturers")
+        await conn.execute("DELETE FROM lecture_groups")
+        await conn.execute("DELETE FROM lectures")
+        await conn.executemany(
             """
-            UPDATE users SET groupId=?
-            WHERE id=?
+            INSERT INTO lectures VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (group_id, user_id),
+            (self.lecture_row(lecture, ids) for lecture in lectures.values()),
         )
-
-        await self.conn.commit()
-
-    async def get_ids(self) -> list[int]:
-        """Получение ID всех пользователей бота."""
-        async with self.conn.execute(
+        await conn.executemany(
             """
-            SELECT id FROM users
+            INSERT INTO lecture_lecturers VALUES (?, ?, ?)
+            """,
+            (
+                (lecture["id"], position, ids["lecturers"][lecturer])
+                for lecture in lectures.values()
+                for position, lecturer in enumerate(
+                    self.lecturer_names(lecture)
+                )
+            ),
+        )
+        await conn.executemany(
             """
-        ) as cursor:
-            user_ids = await cursor.fetchall()
-            return [user_id[0] for user_id in user_ids]
+            INSERT INTO lecture_groups VALUES (?, ?, ?, ?)
+            """,
+            (
+                (group_id, to_iso(date), position, lecture["id"])
+                for group_id, days in schedule.items()
+                for date, day in days.items()
+                for position, lecture in enumerate(day)
+            ),
+        )
 
-    async def has_group(self, user_id: int) -> bool:
-        """Проверка наличия группы у пользователя."""
-        async with self.conn.execute(
-            """
-            SELECT EXISTS (
-                SELECT * FROM users
-                WHERE id=? and groupId IS NOT NULL
+    async def add_lookups(
+        self, conn: aiosqlite.Connection, lectures: list[dict]
+    ) -> dict[str, dict[str, int]]:
+        """Добавление дисциплин, преподавателей, аудиторий и корпусов."""
+        titles = {table: set() for table in self.lookup_tables}
+        for lecture in lectures:
+            titles["disciplines"].add(lecture["discipline"]["title"])
+            titles["lecturers"].update(self.lecturer_names(lecture))
+            titles["auditories"].add((lecture["auditory"] or {}).get("title"))
+            titles["builds"].add((lecture["build"] or {}).get("title"))
+
+        ids = {}
+        for table in self.lookup_tables:
+            titles[table].discard(None)
+            await conn.executemany(
+                f"INSERT OR IGNORE INTO {table} (title) VALUES (?)",
+                ((title,) for title in titles[table]),
             )
+            async with conn.execute(
+                f"SELECT title, id FROM {table}"
+            ) as cursor:
+                ids[table] = dict(await cursor.fetchall())
+        return ids
+
+    @staticmethod
+    def lecturer_names(lecture: dict) -> list[str]:
+        """Получение коротких имён преподавателей пары."""
+        return [lecturer["shortName"] for lecturer in lecture["lecturers"]]
+
+    @staticmethod
+    def lecture_row(lecture: dict, ids: dict[str, dict[str, int]]) -> tuple:
+        """Преобразование пары в строку таблицы lectures."""
+        auditory = (lecture["auditory"] or {}).get("title")
+        build = (lecture["build"] or {}).get("title")
+        return (
+            lecture["id"],
+            to_iso(lecture["dateEvent"]),
+            lecture["startTime"],
+            lecture["endTime"],
+            lecture["abbrlessontype"],
+            ids["disciplines"][lecture["discipline"]["title"]],
+            ids["auditories"].get(auditory),
+            ids["builds"].get(build),
+            lecture["onlineEvent"],
+        )
+
+    def covers(self, date: str) -> bool:
+        """Проверка наличия расписания на дату в хранилище."""
+        return date in self.dates
+
+    async def get_schedule(
+        self, group_id: int, start_date: str, end_date: str
+    ) -> list[dict]:
+        """Получение пар группы за временной промежуток."""
+        return await self.select_lectures(
+            """
+            FROM lecture_groups AS lg
+            JOIN lectures AS l ON l.id = lg.lecture_id
+            WHERE lg.group_id = ? AND lg.date BETWEEN ? AND ?
+            ORDER BY lg.date, lg.position
             """,
-            (user_id,),
-        ) as cursor:
-            return (await cursor.fetchone())[0]
+            (group_id, to_iso(start_date), to_iso(end_date)),
+        )
 
-    async def get_group(self, user_id: int) -> int:
-        """Получение группы пользователя."""
-        async with self.conn.execute(
+    async def get_lecturer_schedule(
+        self, lecturer: str, date: str
+    ) -> list[dict]:
+        """Получение пар преподавателя на дату."""
+        return await self.select_lectures(
             """
-            SELECT groupId FROM users
-            WHERE id=?
+            FROM lectures AS l
+            WHERE l.date = ? AND l.id IN (
+                SELECT ll.lecture_id FROM lecture_lecturers AS ll
+                JOIN lecturers AS le ON le.id = ll.lecturer_id
+                WHERE le.title = ?
+            )
+            ORDER BY l.start_time
             """,
-            (user_id,),
-        ) as cursor:
-            return (await cursor.fetchone())[0]
+            (to_iso(date), lecturer),
+        )
 
-    async def delete_group(self, user_id: int) -> None:
-        """Удаление группы пользователя."""
-        await self.conn.execute(
+    async def get_auditory_schedule(
+        self, auditory: str, date: str
+    ) -> list[dict]:
+        """Получение пар в аудитории на дату."""
+        return await self.select_lectures(
             """
-            UPDATE users SET groupID=NULL
-            WHERE id=?
+            FROM lectures AS l
+            WHERE l.date = ? AND l.auditory_id = (
+                SELECT id FROM auditories WHERE title = ?
+            )
+            ORDER BY l.start_time
             """,
-            (user_id,),
+            (to_iso(date), auditory),
         )
+
+    async def select_lectures(self, query: str, params: tuple) -> list[dict]:
+        """Выборка пар в формате ответа API ЧГУ."""
+        async with self.storage.reader() as conn:
+            async with conn.execute(self.columns + query, params) as cursor:
+                rows = await cursor.fetchall()
+            lecturers = await self.get_lecturers(
+                conn, {row[0] for row in rows}
+            )
+        return [self.lecture_dict(row, lecturers) for row in rows]
+
+    @staticmethod
+    async def get_lecturers(
+        conn: aiosqlite.Connection, lecture_ids: set[int]
+    ) -> dict[int, list]:
+        """Получение преподавателей для набора пар."""
+        lecturers = {lecture_id: [] for lecture_id in lecture_ids}
+        async with conn.execute(
+            f"""
+            SELECT ll.lecture_id, le.title FROM lecture_lecturers AS ll
+            JOIN lecturers AS le ON le.id = ll.lecturer_id
+            WHERE ll.lecture_id IN ({", ".join("?" * len(lecture_ids))})
+            ORDER BY ll.lecture_id, ll.position
+            """,
+            tuple(lecture_ids),
+        ) as cursor:
+            for lecture_id, title in await cursor.fetchall():
+                lecturers[lecture_id].append({"shortName": title})
+        return lecturers
+
+    @staticmethod
+    def lecture_dict(row: tuple, lecturers: dict[int, list]) -> dict:
+        """Преобразование строки выборки в пару формата API ЧГУ."""
+        lecture_id, date, start, end, lesson_type = row[:5]
+        discipline, auditory, build, online_event = row[5:]
+        return {
+            "id": lecture_id,
+            "dateEvent": from_iso(date),
+            "startTime": start,
+            "endTime": end,
+            "abbrlessontype": lesson_type,
+            "discipline": {"title": discipline},
+            "lecturers": lecturers[lecture_id],
+            "auditory": None if auditory is None else {"title": auditory},
+            "build": None if build is None else {"title": build},
+            "onlineEvent": online_event,
+        }
@@ -0,0 +1,331 @@
+"""Модуль локальной замены API ЧГУ для нагрузочных проверок.
+
+Запуск:
+
+    python chsu_bot/fake_api.py --groups 600 --latency 0.2
+
+После запуска бот можно направить на сервер переменной окружения
+API_URL=http://127.0.0.1:8081/api/
+"""
+
+import argparse
+import asyncio
+import base64
+import datetime
+import json
+import random
+import secrets
+import time
+
+from aiohttp import web
+from aiohttp.typedefs import Handler
+
+
+DISCIPLINES = [
+    "Математический анализ",
+    "Линейная алгебра",
+    "Программирование",
+    "Базы данных",
+    "Физическая культура",
+    "Иностранный язык",
+    "История России",
+    "Философия",
+    "Экономика",
+    "Теория вероятностей",
+]
+
+LECTURERS = [
+    ("Иванов И.И.", "Иванов Иван Иванович"),
+    ("Петрова А.С.", "Петрова Анна Сергеевна"),
+    ("Смирнов П.А.", "Смирнов Павел Андреевич"),
+    ("Кузнецова Е.В.", "Кузнецова Елена Викторовна"),
+    ("Попов Д.Н.", "Попов Дмитрий Николаевич"),
+    ("Соколова М.О.", "Соколова Мария Олеговна"),
+]
+
+LESSON_TYPES = ["лек", "пр", "лаб", None]
+
+BUILDS = ["Советский, 8", "Луначарского, 5а", "Коммунистов, 2", None]
+
+LESSON_TIMES = [
+    ("08:30", "10:00"),
+    ("10:10", "11:40"),
+    ("12:20", "13:50"),
+    ("14:00", "15:30"),
+    ("15:40", "17:10"),
+    ("17:20", "18:50"),
+]
+
+INSTITUTES = "01234579"
+
+
+class FakeTimetable:
+    """Генератор синтетических групп и занятий."""
+
+    def __init__(
+        self,
+        groups: int = 600,
+        lectures_per_day: int = 3,
+        shared_share: float = 0.3,
+        padding: int = 0,
+        seed: int = 17,
+    ) -> None:
+        self.lectures_per_day = lectures_per_day
+        self.shared_share = shared_share
+        self.padding = "." * padding
+        self.seed = seed
+        self.groups = [
+            {
+                "id": 1000 + i,
+                "title": f"{INSTITUTES[i % len(INSTITUTES)]}"
+                f"ГР-{i // len(INSTITUTES):02}-{21 + i % 4}",
+            }
+            for i in range(groups)
+        ]
+        self.events: dict[str, list[dict]] = {}
+        self.events_by_group: dict[str, dict[int, list[dict]]] = {}
+
+    def get_events(self, date: str) -> list[dict]:
+        """Получение всех занятий на дату."""
+        if date not in self.events:
+            self.events[date] = self.generate_events(date)
+            by_group = {}
+            for event in self.events[date]:
+                for group in event["groups"]:
+                    by_group.setdefault(group["id"], []).append(event)
+            self.events_by_group[date] = by_group
+        return self.events[date]
+
+    def get_group_events(self, date: str, group_id: int) -> list[dict]:
+        """Получение занятий группы на дату."""
+        self.get_events(date)
+        return self.events_by_group[date].get(group_id, [])
+
+    def generate_events(self, date: str) -> list[dict]:
+        """Генерация занятий всех групп на дату."""
+        day = datetime.datetime.strptime(date, "%d.%m.%Y")
+        if day.weekday() == 6:
+            return []
+        rnd = random.Random(f"{self.seed}-{date}")
+        events = []
+        for i in range(0, len(self.groups), 3):
+            events.extend(
+                self.generate_stream_events(rnd, date, self.groups[i : i + 3])
+            )
+        return events
+
+    def generate_stream_events(
+        self, rnd: random.Random, date: str, stream: list[dict]
+    ) -> list[dict]:
+        """Генерация занятий потока групп: общих и раздельных."""
+        events = []
+        for number in range(self.lectures_per_day):
+            if rnd.random() < self.shared_share:
+                events.append(self.make_event(rnd, date, number, stream))
+            else:
+                events.extend(
+                    self.make_event(rnd, date, number, [group])
+                    for group in stream
+                )
+        return events
+
+    def make_event(
+        self,
+        rnd: random.Random,
+        date: str,
+        number: int,
+        groups: list[dict],
+    ) -> dict:
+        """Создание одного занятия."""
+        start_time, end_time = LESSON_TIMES[number % len(LESSON_TIMES)]
+        online = rnd.random() < 0.1
+        build = None if online else rnd.choice(BUILDS)
+        return {
+            "id": rnd.randrange(10**9),
+            "dateEvent": date,
+            "startTime": start_time,
+            "endTime": end_time,
+            "abbrlessontype": rnd.choice(LESSON_TYPES),
+            "discipline": {"title": rnd.choice(DISCIPLINES)},
+            "lecturers": [
+                {"shortName": short_name, "fio": fio}
+                for short_name, fio in rnd.sample(
+                    LECTURERS, rnd.choice([1, 1, 2])
+                )
+            ],
+            "groups": groups,
+            "auditory": None
+            if online or build is None
+            else {"title": str(rnd.randrange(100, 500))},
+            "build": None if build is None else {"title": build},
+            "onlineEvent": "https://meet.example/room" if online else None,
+            "description": self.padding,
+        }
+
+    def get_range(
+        self, start_date: str, end_date: str, group_id: int = None
+    ) -> list[dict]:
+        """Получение занятий за временной промежуток."""
+        start = datetime.datetime.strptime(start_date, "%d.%m.%Y")
+        end = datetime.datetime.strptime(end_date, "%d.%m.%Y")
+        events = []
+        for i in range((end - start).days + 1):
+            date = (start + datetime.timedelta(days=i)).strftime("%d.%m.%Y")
+            if group_id is None:
+                events.extend(self.get_events(date))
+            else:
+                events.extend(self.get_group_events(date, group_id))
+        return events
+
+
+class FakeChsuAPI:
+    """Локальный сервер, повторяющий поведение API ЧГУ."""
+
+    def __init__(
+        self,
+        timetable: FakeTimetable,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        token_ttl: int = 3600,
+    ) -> None:
+        self.timetable = timetable
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.tokens: dict[str, float] = {}
+        self.requests = 0
+        self.signins = 0
+
+    def app(self) -> web.Application:
+        """Создание приложения aiohttp."""
+        app = web.Application(middlewares=[self.faults])
+        app.add_routes(
+            [
+                web.post("/api/auth/signin/", self.signin),
+                web.get("/api/group/v1", self.groups),
+                web.get(
+                    "/api/timetable/v1/from/{start}/to/{end}"
+                    "/groupId/{group_id}/",
+                    self.group_timetable,
+                ),
+                web.get(
+                    "/api/timetable/v1/event/from/{start}/to/{end}/",
+                    self.all_groups_timetable,
+                ),
+                web.get("/stats", self.stats),
+            ]
+        )
+        return app
+
+    @web.middleware
+    async def faults(
+        self, request: web.Request, handler: Handler
+    ) -> web.StreamResponse:
+        """Добавление задержки и случайных ошибок к ответам."""
+        self.requests += 1
+        await asyncio.sleep(
+            max(self.latency + random.uniform(-1, 1) * self.jitter, 0)
+        )
+        if request.path != "/stats" and random.random() < self.error_rate:
+            raise web.HTTPServiceUnavailable(text="fault injected")
+        return await handler(request)
+
+    def make_token(self) -> str:
+        """Создание токена в формате JWT со сроком действия."""
+        issued = int(time.time())
+        claims = {"iat": issued, "exp": issued + self.token_ttl}
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode())
+        token = f"e30.{payload.decode().rstrip('=')}.{secrets.token_hex(8)}"
+        self.tokens[token] = time.time() + self.token_ttl
+        return token
+
+    def authorized(self, request: web.Request) -> bool:
+        """Проверка действительности токена из заголовков."""
+        token = request.headers.get("Authorization", "")
+        expires = self.tokens.get(token.removeprefix("Bearer "))
+        return expires is not None and expires > time.time()
+
+    async def signin(self, request: web.Request) -> web.Response:
+        """Выдача нового токена."""
+        self.signins += 1
+        return web.json_response({"data": self.make_token()})
+
+    def redirect(self) -> web.Response:
+        """Ответ на запрос с просроченным токеном."""
+        return web.Response(
+            status=302,
+            headers={"Location": "/auth/signin"},
+            text="Found",
+            content_type="text/html",
+        )
+
+    async def groups(self, request: web.Request) -> web.Response:
+        """Выдача списка групп."""
+        if not self.authorized(request):
+            return self.redirect()
+        return web.json_response(self.timetable.groups)
+
+    async def group_timetable(self, request: web.Request) -> web.Response:
+        """Выдача расписания группы за временной промежуток."""
+        if not self.authorized(request):
+            return self.redirect()
+        info = request.match_info
+        return web.json_response(
+            self.timetable.get_range(
+                info["start"], info["end"], int(info["group_id"])
+            )
+        )
+
+    async def all_groups_timetable(self, request: web.Request) -> web.Response:
+        """Выдача расписания всех групп за временной промежуток."""
+        if not self.authorized(request):
+            return self.redirect()
+        info = request.match_info
+        return web.json_response(
+            self.timetable.get_range(info["start"], info["end"])
+        )
+
+    async def stats(self, request: web.Request) -> web.Response:
+        """Выдача статистики обращений к серверу."""
+        return web.json_response(
+            {"requests": self.requests, "signins": self.signins}
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    """Получение параметров запуска из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--groups", type=int, default=600)
+    parser.add_argument("--lectures-per-day", type=int, default=3)
+    parser.add_argument("--shared-share", type=float, default=0.3)
+    parser.add_argument("--padding", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--token-ttl", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=17)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Запуск сервера."""
+    args = parse_args()
+    timetable = FakeTimetable(
+        args.groups,
+        args.lectures_per_day,
+        args.shared_share,
+        args.padding,
+        args.seed,
+    )
+    server = FakeChsuAPI(
+        timetable, args.latency, args.jitter, args.error_rate, args.token_ttl
+    )
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
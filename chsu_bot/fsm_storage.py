@@ -0,0 +1,290 @@
+"""Модуль хранилища состояний пользователей в SQLite."""
+
+import asyncio
+from collections import OrderedDict
+import copy
+import datetime
+import json
+import time
+
+from aiogram.dispatcher.storage import BaseStorage
+import aiosqlite
+from db import Storage
+
+Record = tuple[str | None, dict, float]
+
+
+def encode_value(value: object) -> dict[str, str]:
+    """Преобразование дат в данных состояния для JSON."""
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def decode_object(obj: dict) -> object:
+    """Восстановление дат из данных состояния."""
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return datetime.date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def dump_data(data: dict) -> str:
+    """Сериализация данных состояния."""
+    return json.dumps(data, default=encode_value, ensure_ascii=False)
+
+
+def load_data(data: str) -> dict:
+    """Десериализация данных состояния."""
+    return json.loads(data, object_hook=decode_object)
+
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище состояний FSM в БД бота с кэшем в памяти.
+
+    Изменения сначала попадают в память и записываются в таблицу fsm
+    пачками в фоне, как у Users, поэтому обработчики не ждут
+    блокировку записи, которую обновление расписания держит
+    несколько секунд. Пока изменение не записано, чтения отвечают
+    из него. Последние использованные записи держатся в памяти,
+    поэтому чтения активных диалогов не обращаются к БД. Записи,
+    которые не менялись дольше ttl секунд, считаются пустыми
+    и удаляются методом expire.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        ttl: int = 86400,
+        cache_size: int = 10000,
+        flush_interval: float = 0.05,
+    ) -> None:
+        self.storage = storage
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.records: OrderedDict[tuple[str, str], Record] = OrderedDict()
+        self.pending: dict[tuple[str, str], Record] = {}
+        self.flushing: dict[tuple[str, str], Record] = {}
+        self.flush_lock = asyncio.Lock()
+        self.flush_task: asyncio.Task | None = None
+
+    async def close(self) -> None:
+        """Запись незаписанных изменений и очистка кэша состояний."""
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            await asyncio.gather(self.flush_task, return_exceptions=True)
+        await self.flush()
+        self.records.clear()
+
+    async def wait_closed(self) -> None:
+        """Ожидание закрытия хранилища."""
+
+    def resolve_key(
+        self, chat: str | int | None, user: str | int | None
+    ) -> tuple[str, str]:
+        """Получение ключа записи по чату и пользователю."""
+        chat, user = self.check_address(chat=chat, user=user)
+        return str(chat), str(user)
+
+    def remember(self, key: tuple[str, str], record: Record) -> None:
+        """Сохранение записи в кэше."""
+        self.records[key] = record
+        self.records.move_to_end(key)
+        if len(self.records) > self.cache_size:
+            self.records.popitem(last=False)
+
+    async def load(self, key: tuple[str, str]) -> Record:
+        """Получение записи из незаписанных изменений, кэша или БД."""
+        record = self.pending.get(key, self.flushing.get(key))
+        if record is None:
+            record = self.records.get(key)
+        if record is None:
+            record = await self.fetch(key)
+        self.remember(key, record)
+        if time.time() - record[2] > self.ttl:
+            return None, {}, 0
+        return record
+
+    async def fetch(self, key: tuple[str, str]) -> Record:
+        """Получение записи из БД.
+
+        Отсутствующая запись тоже кэшируется, чтобы проверка
+        состояния пользователей вне диалогов не обращалась к БД.
+        """
+        async with self.storage.reader() as conn, conn.execute(
+            """
+            SELECT state, data, updated FROM fsm
+            WHERE chat_id=? AND user_id=?
+            """,
+            key,
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None, {}, 0
+        return row[0], load_data(row[1]), row[2]
+
+    async def save(
+        self, key: tuple[str, str], state: str | None, data: dict
+    ) -> None:
+        """Запись состояния и данных в кэш и очередь на запись в БД."""
+        if state is None and not data:
+            record = (None, {}, 0)
+        else:
+            record = (state, data, time.time())
+        self.remember(key, record)
+        self.pending[key] = record
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self) -> None:
+        """Запись изменений после flush_interval."""
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Запись накопленных изменений одной транзакцией.
+
+        Если запись не удалась или была отменена, изменения
+        возвращаются в очередь, а более новые изменения тех же
+        пользователей сохраняются.
+        """
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            self.flushing, self.pending = self.pending, {}
+            try:
+                async with self.storage.transaction() as conn:
+                    await self.write_records(conn, self.flushing)
+            except BaseException:
+                self.pending = self.flushing | self.pending
+                raise
+            finally:
+                self.flushing = {}
+
+    @staticmethod
+    async def write_records(
+        conn: aiosqlite.Connection, records: dict[tuple[str, str], Record]
+    ) -> None:
+        """Запись и удаление состояний внутри транзакции."""
+        await conn.executemany(
+            """
+            DELETE FROM fsm WHERE chat_id=? AND user_id=?
+            """,
+            [key for key, record in records.items() if not record[2]],
+        )
+        await conn.executemany(
+            """
+            INSERT INTO fsm (chat_id, user_id, state, data, updated)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (chat_id, user_id) DO UPDATE SET
+                state=excluded.state,
+                data=excluded.data,
+                updated=excluded.updated
+            """,
+            [
+                (*key, state, dump_data(data), updated)
+                for key, (state, data, updated) in records.items()
+                if updated
+            ],
+        )
+
+    async def get_state(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        default: str | None = None,
+    ) -> str | None:
+        """Получение состояния пользователя."""
+        state = (await self.load(self.resolve_key(chat, user)))[0]
+        if state is None:
+            return self.resolve_state(default)
+        return state
+
+    async def get_data(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        default: dict | None = None,
+    ) -> dict:
+        """Получение данных пользователя."""
+        data = (await self.load(self.resolve_key(chat, user)))[1]
+        return copy.deepcopy(data or default or {})
+
+    async def set_state(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        state: str | None = None,
+    ) -> None:
+        """Изменение состояния пользователя."""
+        key = self.resolve_key(chat, user)
+        data = (await self.load(key))[1]
+        await self.save(key, self.resolve_state(state), data)
+
+    async def set_data(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        data: dict | None = None,
+    ) -> None:
+        """Замена данных пользователя."""
+        key = self.resolve_key(chat, user)
+        state = (await self.load(key))[0]
+        await self.save(key, state, copy.deepcopy(data or {}))
+
+    async def update_data(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        data: dict | None = None,
+        **kwargs: object,
+    ) -> None:
+        """Дополнение данных пользователя."""
+        key = self.resolve_key(chat, user)
+        state, stored, _ = await self.load(key)
+        stored = {**stored, **copy.deepcopy(data or {}), **kwargs}
+        await self.save(key, state, stored)
+
+    async def reset_state(
+        self,
+        *,
+        chat: str | int | None = None,
+        user: str | int | None = None,
+        with_data: bool | None = True,
+    ) -> None:
+        """Сброс состояния пользователя одной записью."""
+        key = self.resolve_key(chat, user)
+        data = {} if with_data else (await self.load(key))[1]
+        await self.save(key, None, data)
+
+    async def expire(self) -> int:
+        """Удаление устаревших состояний из кэша и БД."""
+        deadline = time.time() - self.ttl
+        for key in [
+            key for key, record in self.records.items() if record[2] < deadline
+        ]:
+            del self.records[key]
+        async with self.storage.transaction() as conn:
+            cursor = await conn.execute(
+                """
+                DELETE FROM fsm WHERE updated < ?
+                """,
+                (deadline,),
+            )
+        return cursor.rowcount
+
+    async def loop_expire(self) -> None:
+        """Цикл удаления устаревших состояний."""
+        while True:
+            await asyncio.sleep(min(self.ttl, 3600))
+            await self.expire()
@@ -1,6 +1,8 @@
 """Модуль для обработчиков бота."""
 
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
+from itertools import chain
 
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters import (
@@ -10,33 +12,54 @@ from aiogram.dispatcher.filters import (
 from aiogram.dispatcher.filters.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, Update
 from aiogram.utils import exceptions
+import callback as cb
 from db import Groups, Users
 import keyboard as kb
 from loguru._logger import Logger
-from parse import ChsuAPI
-from router import CallbackRouter, ErrorRouter, MessageRouter, Routes
-from schedule import Schedule
+from parse import ServerNotAnswer
+from router import (
+    CallbackDispatcher,
+    CallbackRouter,
+    ErrorRouter,
+    MessageRouter,
+    MiddlewareRouter,
+    Routes,
+)
+from schedule import paginate, Schedule
 import templtaes as tmp
+from throttling import ThrottlingMiddleware
+from timetable import Timetable
 
 
 class BotLogic(Routes):
     """Класс для добавления обработчиков."""
 
     def __init__(
-        self, logger: Logger, gs: Groups, us: Users, api: ChsuAPI
+        self,
+        logger: Logger,
+        gs: Groups,
+        us: Users,
+        timetable: Timetable,
+        throttling: ThrottlingMiddleware,
     ) -> None:
+        group_pages = kb.GroupPages()
         super().__init__(
+            MiddlewareRouter(throttling),
             Welcome(us),
             ChooseDate(us),
-            TodaySchedule(api, gs, us),
+            TodaySchedule(timetable, gs, us),
             TomorrowSchedule(gs, us),
-            GetAnotherDaySchedule(api, gs),
-            GetRangeDateSchedule(api, us),
+            WeekSchedule(timetable, us),
+            GetAnotherDaySchedule(timetable, gs),
+            GetRangeDateSchedule(timetable, us),
             GetSettings(us),
             RememberGroup(us),
-            GetDate(api, us),
-            GetInstitute(gs),
-            GetGroup(api, gs, us),
+            CallbackDispatcher(
+                GetDate(timetable, us),
+                GetInstitute(gs, group_pages),
+                GetGroup(timetable, gs, us, group_pages),
+                stale_text=tmp.STALE_BUTTON,
+            ),
             ChangeUserGroup(us),
             DeleteUserGroup(us),
             BackToMainMenu(),
@@ -57,8 +80,7 @@ class Welcome(MessageRouter):
 
     async def handle(self, message: Message) -> None:
         """Метод обработки сообщения."""
-        if not (await self.db.in_db(message.from_user.id)):
-            await self.db.add_user(message.from_user.id)
+        await self.db.get_profile(message.from_user.id)
         await message.answer(
             text=tmp.USER_GREETING.format(message.from_user.first_name),
             reply_markup=kb.GreetingKeyboard(),
@@ -77,8 +99,7 @@ class ChooseDate(MessageRouter):
 
     async def handle(self, message: Message) -> None:
         """Метод обработки сообщения."""
-        if not await self.db.in_db(message.from_user.id):
-            await self.db.add_user(message.from_user.id)
+        await self.db.get_profile(message.from_user.id)
         await message.answer(
             text=tmp.CHOICE_DATE,
             reply_markup=kb.ChoiceDateKeyboard(),
@@ -95,8 +116,8 @@ class TodayScheduleSelection(StatesGroup):
 class TodaySchedule(MessageRouter):
     """Класс обработки сообщения 'На сегодня'."""
 
-    def __init__(self, api: ChsuAPI, gs: Groups, us: Users) -> None:
-        self.api = api
+    def __init__(self, timetable: Timetable, gs: Groups, us: Users) -> None:
+        self.timetable = timetable
         self.us = us
         self.gs = gs
         super().__init__(
@@ -106,13 +127,11 @@ class TodaySchedule(MessageRouter):
 
     async def handle(self, message: Message, state: FSMContext) -> None:
         """Метод обработки сообщения."""
-        if not await self.us.in_db(message.from_user.id):
-            await self.us.add_user(message.from_user.id)
-        if await self.us.has_group(message.from_user.id):
-            group_id = await self.us.get_group(message.from_user.id)
-            schedule = [await self.gs.td_schedule(group_id)]
+        group_id = await self.us.get_profile(message.from_user.id)
+        if group_id is not None:
+            messages = await self.gs.td_schedule(group_id)
             await state.finish()
-            await ScheduleService(schedule, message).send_schedule()
+            await ScheduleService(messages, message).send_schedule()
         else:
             await state.set_state(TodayScheduleSelection.institute)
             await message.answer(
@@ -141,14 +160,11 @@ class TomorrowSchedule(MessageRouter):
 
     async def handle(self, message: Message, state: FSMContext) -> None:
         """Метод обработки сообщения."""
-        if not await self.us.in_db(message.from_user.id):
-            await self.us.add_user(message.from_user.id)
-
-        if await self.us.has_group(message.from_user.id):
-            group_id = await self.us.get_group(message.from_user.id)
-            schedule = [await self.gs.tm_schedule(group_id)]
+        group_id = await self.us.get_profile(message.from_user.id)
+        if group_id is not None:
+            messages = await self.gs.tm_schedule(group_id)
             await state.finish()
-            await ScheduleService(schedule, message).send_schedule()
+            await ScheduleService(messages, message).send_schedule()
         else:
             await state.set_state(TomorrowScheduleSelection.institute)
             await message.answer(
@@ -157,6 +173,48 @@ class TomorrowSchedule(MessageRouter):
             )
 
 
+class WeekScheduleSelection(StatesGroup):
+    """Класс состояний для получения расписания на неделю."""
+
+    institute = State()
+    group = State()
+
+
+class WeekSchedule(MessageRouter):
+    """Класс обработки сообщения 'На неделю'."""
+
+    def __init__(self, timetable: Timetable, us: Users) -> None:
+        self.timetable = timetable
+        self.us = us
+        super().__init__(
+            message_filters=TextFilter("На неделю"),
+            handler=self.handle,
+        )
+
+    async def handle(self, message: Message, state: FSMContext) -> None:
+        """Метод обработки сообщения."""
+        group_id = await self.us.get_profile(message.from_user.id)
+        start_date = datetime.now()
+        end_date = start_date + timedelta(days=6)
+        if group_id is not None:
+            schedule = await self.timetable.get_schedule(
+                group_id,
+                start_date.strftime("%d.%m.%Y"),
+                end_date.strftime("%d.%m.%Y"),
+            )
+            await state.finish()
+            await ScheduleService.from_lectures(
+                schedule, message
+            ).send_schedule()
+        else:
+            await state.set_state(WeekScheduleSelection.institute)
+            await state.update_data(start_date=start_date, end_date=end_date)
+            await message.answer(
+                text=tmp.CHOOSE_FIRST_INSTITUTE_NUMBER,
+                reply_markup=kb.Institutions(),
+            )
+
+
 class ScheduleDateSelection(StatesGroup):
     """Класс состояний для получения расписания за определённую дату."""
 
@@ -168,8 +226,8 @@ class ScheduleDateSelection(StatesGroup):
 class GetAnotherDaySchedule(MessageRouter):
     """Класс обработки сообщения 'Выбрать другой день'."""
 
-    def __init__(self, api: ChsuAPI, us: Users) -> None:
-        self.api = api
+    def __init__(self, timetable: Timetable, us: Users) -> None:
+        self.timetable = timetable
         self.us = us
         super().__init__(
             message_filters=TextFilter("Выбрать другой день"),
@@ -200,8 +258,8 @@ class ScheduleRangeSelection(StatesGroup):
 class GetRangeDateSchedule(MessageRouter):
     """Класс обработки сообщения 'Выбрать диапазон'."""
 
-    def __init__(self, api: ChsuAPI, us: Users) -> None:
-        self.api = api
+    def __init__(self, timetable: Timetable, us: Users) -> None:
+        self.timetable = timetable
         self.us = us
         super().__init__(
             message_filters=TextFilter("Выбрать диапазон"),
@@ -223,40 +281,50 @@ class GetRangeDateSchedule(MessageRouter):
 class GetDate(CallbackRouter):
     """Класс получения даты."""
 
-    def __init__(self, api: ChsuAPI, us: Users) -> None:
-        self.api = api
+    def __init__(self, timetable: Timetable, us: Users) -> None:
+        self.timetable = timetable
         self.us = us
         super().__init__(
+            handlers={
+                cb.DAY: self.handle,
+                cb.MONTH: self.change_month,
+                cb.CLOSE_CALENDAR: self.close_calendar,
+                cb.NOOP: self.ignore,
+            },
             state=[
                 ScheduleRangeSelection.start,
                 ScheduleRangeSelection.end,
                 ScheduleDateSelection.date,
             ],
-            handler=self.handle,
         )
 
-    async def handle(self, callback: CallbackQuery, state: FSMContext) -> None:
-        """Метод обработки сообщения."""
-        match callback.data.split():
-            case pointer, date:
-                await self.change_month(pointer, date, callback)
-            case "menu", :
-                await state.finish()
-                await callback.message.edit_text(text="Вложение удалено")
-            case "None", :
-                pass
-            case date, :
-                current_state = (await state.get_state()).split(":")[1]
-                if current_state in [
-                    "start",
-                    "date",
-                ] or await self.valid_range_length(date, state):
-                    await self.save_date(date, state)
-                    await self.answer(callback, state)
-                else:
-                    await callback.message.answer(
-                        text=tmp.RANGE_LENGTH_EXCEEDED,
-                    )
+    async def handle(
+        self, callback: CallbackQuery, state: FSMContext, date: str
+    ) -> None:
+        """Метод обработки выбора даты."""
+        if await state.get_state() in (
+            ScheduleDateSelection.date.state,
+            ScheduleRangeSelection.start.state,
+        ) or await self.valid_range_length(date, state):
+            await self.save_date(date, state)
+            await self.answer(callback, state)
+        else:
+            await callback.message.answer(
+                text=tmp.RANGE_LENGTH_EXCEEDED,
+            )
+
+    @staticmethod
+    async def close_calendar(
+        callback: CallbackQuery, state: FSMContext
+    ) -> None:
+        """Закрытие календаря."""
+        await state.finish()
+        await callback.message.edit_text(text="Вложение удалено")
+
+    @staticmethod
+    async def ignore(callback: CallbackQuery, state: FSMContext) -> None:
+        """Ответ на нажатие пустой кнопки календаря."""
+        await callback.answer()
 
     @staticmethod
     async def valid_range_length(current_date: str, state: FSMContext) -> bool:
@@ -267,29 +335,24 @@ class GetDate(CallbackRouter):
 
     @staticmethod
     async def change_month(
-        pointer: str, date: str, callback: CallbackQuery
+        callback: CallbackQuery, state: FSMContext, month: int, year: int
     ) -> None:
         """Смена месяца на клваиатуре."""
-        month, year = map(int, date.split("."))
-        calendar = kb.CalendarMarkup(month, year)
-        if pointer == "next":
-            await callback.message.edit_reply_markup(calendar.next_month())
-        else:
-            await callback.message.edit_reply_markup(calendar.previous_month())
+        await callback.message.edit_reply_markup(
+            kb.CalendarMarkup(month, year)
+        )
 
     async def save_date(self, date: str, state: FSMContext) -> None:
         """Сохранение выбранной даты."""
         date = datetime.strptime(date, "%d.%m.%Y")
-        state_name, current_state = (await state.get_state()).split(":")
-        if state_name == "ScheduleDateSelection":
-            await state.update_data(start_date=date)
-            await state.update_data(end_date=date)
-        else:
-            if current_state == "start":
+        match await state.get_state():
+            case ScheduleRangeSelection.start.state:
                 await state.update_data(start_date=date)
-            else:
+            case ScheduleRangeSelection.end.state:
                 date = await self.date_correction(date, state)
                 await state.update_data(end_date=date)
+            case _:
+                await state.update_data(start_date=date, end_date=date)
 
     @staticmethod
     async def date_correction(current_date: str, state: FSMContext) -> str:
@@ -309,24 +372,26 @@ class GetDate(CallbackRouter):
 
     async def answer(self, callback: CallbackQuery, state: FSMContext) -> None:
         """Ответ пользователю."""
-        state_name, current_state = (await state.get_state()).split(":")
-        if current_state == "date" or current_state == "end":
-            if await self.us.has_group(callback.from_user.id):
+        current_state = await state.get_state()
+        if current_state in (
+            ScheduleDateSelection.date.state,
+            ScheduleRangeSelection.end.state,
+        ):
+            group_id = await self.us.get_profile(callback.from_user.id)
+            if group_id is not None:
                 data = await state.get_data()
                 await state.finish()
                 await self.close_markup(callback)
-                group_id = await self.us.get_group(callback.from_user.id)
-                schedule = await self.api.get_schedule(
+                schedule = await self.timetable.get_schedule(
                     group_id,
                     data["start_date"].strftime("%d.%m.%Y"),
                     data["end_date"].strftime("%d.%m.%Y"),
                 )
-                await ScheduleService(
+                await ScheduleService.from_lectures(
                     schedule, callback.message
                 ).send_schedule()
             else:
-                state_name = eval(state_name)
-                await state.set_state(state_name.institute)
+                await state.set_state(transitions.get_next(current_state))
                 await callback.message.edit_text(
                     text=tmp.CHOOSE_FIRST_INSTITUTE_NUMBER,
                     reply_markup=kb.Institutions(),
@@ -348,56 +413,122 @@ class ChangeGroupInfo(StatesGroup):
     group = State()
 
 
+class StateTransitions:
+    """Класс таблицы переходов между состояниями.
+
+    Таблица строится один раз: переход вперёд ведёт к следующему
+    по порядку объявления состоянию своего набора, переход назад
+    к предыдущему. Для каждого состояния запоминается его набор.
+    """
+
+    def __init__(self, *states_groups: type[StatesGroup]) -> None:
+        self.next_states: dict[str, State] = {}
+        self.previous_states: dict[str, State] = {}
+        self.states_groups: dict[str, type[StatesGroup]] = {}
+        for states_group in states_groups:
+            states = states_group.all_states
+            self.states_groups.update(
+                dict.fromkeys(states_group.all_states_names, states_group)
+            )
+            for current, following in zip(states, states[1:]):
+                self.next_states[current.state] = following
+                self.previous_states[following.state] = current
+
+    def get_next(self, state: str) -> State:
+        """Получение следующего состояния."""
+        return self.next_states[state]
+
+    def get_previous(self, state: str) -> State:
+        """Получение предыдущего состояния."""
+        return self.previous_states[state]
+
+    def get_group(self, state: str | None) -> type[StatesGroup] | None:
+        """Получение набора, к которому относится состояние."""
+        return self.states_groups.get(state)
+
+
+transitions = StateTransitions(
+    TodayScheduleSelection,
+    TomorrowScheduleSelection,
+    WeekScheduleSelection,
+    ScheduleDateSelection,
+    ScheduleRangeSelection,
+    ChangeGroupInfo,
+)
+
+
 class GetInstitute(CallbackRouter):
     """Класс получения института пользователя."""
 
-    def __init__(self, gs: Groups) -> None:
+    def __init__(self, gs: Groups, group_pages: kb.GroupPages) -> None:
         self.gs = gs
+        self.group_pages = group_pages
         super().__init__(
+            handlers={
+                cb.INSTITUTE: self.handle,
+                cb.CLOSE_INSTITUTES: self.close_institutes,
+            },
             state=[
                 ChangeGroupInfo.institute,
                 ScheduleDateSelection.institute,
                 ScheduleRangeSelection.institute,
                 TodayScheduleSelection.institute,
                 TomorrowScheduleSelection.institute,
+                WeekScheduleSelection.institute,
             ],
-            handler=self.handle,
         )
 
-    async def handle(self, callback: CallbackQuery, state: FSMContext) -> None:
-        """Метод обработки сообщения."""
-        match callback.data:
-            case "back":
-                await state.finish()
-                await callback.message.edit_text("Вложение удалено")
-            case institute:
-                groups = await self.gs.get_groups_by_first_symbol(
-                    callback.data
-                )
-                state_name = eval((await state.get_state()).split(":")[0])
-                await state.set_state(state_name.group)
-                await callback.message.edit_text(
-                    text="Выберите вашу группу",
-                    reply_markup=kb.GroupKeyboard(groups, institute, 1),
-                )
+    async def handle(
+        self, callback: CallbackQuery, state: FSMContext, institute: str
+    ) -> None:
+        """Метод обработки выбора института."""
+        await state.set_state(transitions.get_next(await state.get_state()))
+        await callback.message.edit_text(
+            text="Выберите вашу группу",
+            reply_markup=self.group_pages.get(self.gs.index, institute, 1),
+        )
+
+    @staticmethod
+    async def close_institutes(
+        callback: CallbackQuery, state: FSMContext
+    ) -> None:
+        """Закрытие клавиатуры институтов."""
+        await state.finish()
+        await callback.message.edit_text("Вложение удалено")
 
 
 class GetGroup(CallbackRouter):
     """Класс получения группы пользователя."""
 
-    def __init__(self, api: ChsuAPI, gs: Groups, us: Users) -> None:
-        self.api = api
+    def __init__(
+        self,
+        timetable: Timetable,
+        gs: Groups,
+        us: Users,
+        group_pages: kb.GroupPages,
+    ) -> None:
+        self.timetable = timetable
         self.gs = gs
         self.us = us
+        self.group_pages = group_pages
+        self.stored_schedules = {
+            TodayScheduleSelection: gs.td_schedule,
+            TomorrowScheduleSelection: gs.tm_schedule,
+        }
         super().__init__(
+            handlers={
+                cb.GROUP: self.handle,
+                cb.GROUP_PAGE: self.change_page,
+                cb.BACK_TO_INSTITUTES: self.back_to_institutes,
+            },
             state=[
                 ChangeGroupInfo.group,
                 ScheduleDateSelection.group,
                 ScheduleRangeSelection.group,
                 TodayScheduleSelection.group,
                 TomorrowScheduleSelection.group,
+                WeekScheduleSelection.group,
             ],
-            handler=self.handle,
         )
 
     @staticmethod
@@ -405,56 +536,80 @@ class GetGroup(CallbackRouter):
         """Скрытие клавиатуры."""
         await callback.message.edit_text(text="Вложение удалено")
 
-    async def handle(self, callback: CallbackQuery, state: FSMContext) -> None:
-        """Метод обработки сообщения."""
-        match callback.data.split():
-            case "back", :
-                state_name = eval((await state.get_state()).split(":")[0])
-                await state.set_state(state_name.institute)
-                await callback.message.edit_text(
-                    text=tmp.CHOOSE_FIRST_INSTITUTE_NUMBER,
-                    reply_markup=kb.Institutions(),
-                )
-            case "next" | "previous", institute, part:
-                groups = await self.gs.get_groups_by_first_symbol(institute)
-                await callback.message.edit_reply_markup(
-                    kb.GroupKeyboard(groups, institute, int(part))
-                )
-            case group_id, :
-                state_name = (await state.get_state()).split(":")[0]
-                if state_name == "ChangeGroupInfo":
-                    await self.change_group(int(group_id), callback, state)
-                else:
-                    await self.send_schedule(int(group_id), callback, state)
+    async def handle(
+        self, callback: CallbackQuery, state: FSMContext, group_id: int
+    ) -> None:
+        """Метод обработки выбора группы."""
+        states_group = transitions.get_group(await state.get_state())
+        if states_group is ChangeGroupInfo:
+            await self.change_group(group_id, callback, state)
+        else:
+            await self.send_schedule(group_id, callback, state, states_group)
+
+    async def change_page(
+        self,
+        callback: CallbackQuery,
+        state: FSMContext,
+        institute: str,
+        part: int,
+    ) -> None:
+        """Смена страницы клавиатуры групп."""
+        await callback.message.edit_reply_markup(
+            self.group_pages.get(self.gs.index, institute, part)
+        )
+
+    @staticmethod
+    async def back_to_institutes(
+        callback: CallbackQuery, state: FSMContext
+    ) -> None:
+        """Возврат к выбору института."""
+        await state.set_state(
+            transitions.get_previous(await state.get_state())
+        )
+        await callback.message.edit_text(
+            text=tmp.CHOOSE_FIRST_INSTITUTE_NUMBER,
+            reply_markup=kb.Institutions(),
+        )
 
     async def send_schedule(
-        self, group_id: int, callback: CallbackQuery, state: FSMContext
+        self,
+        group_id: int,
+        callback: CallbackQuery,
+        state: FSMContext,
+        states_group: type[StatesGroup],
     ) -> None:
-        """Отправка сообщения пользователю."""
-        await self.close_markup(callback)
-        state_info = await state.get_state()
-        schedule = []
-        match state_info.split(":"):
-            case "TodayScheduleSelection", _:
-                schedule = [await self.gs.td_schedule(group_id)]
-            case "TomorrowScheduleSelection", _:
-                schedule = [await self.gs.tm_schedule(group_id)]
-            case "ScheduleDateSelection" | "ScheduleRangeSelection", _:
-                data = await state.get_data()
-                schedule = await self.api.get_schedule(
-                    group_id,
-                    data["start_date"].strftime("%d.%m.%Y"),
-                    data["end_date"].strftime("%d.%m.%Y"),
-                )
+        """Отправка сообщения пользователю.
 
+        Расписание на сегодня и завтра берётся готовым из БД,
+        остальные наборы состояний хранят промежуток дат.
+        """
+        await self.close_markup(callback)
+        stored_schedule = self.stored_schedules.get(states_group)
+        if stored_schedule is not None:
+            messages = await stored_schedule(group_id)
+        else:
+            messages = ScheduleService.build_schedule(
+                await self.get_range_schedule(group_id, state)
+            )
         await state.finish()
-        await ScheduleService(schedule, callback.message).send_schedule()
+        await ScheduleService(messages, callback.message).send_schedule()
+
+    async def get_range_schedule(
+        self, group_id: int, state: FSMContext
+    ) -> list[dict]:
+        """Получение расписания за сохранённый временной промежуток."""
+        data = await state.get_data()
+        return await self.timetable.get_schedule(
+            group_id,
+            data["start_date"].strftime("%d.%m.%Y"),
+            data["end_date"].strftime("%d.%m.%Y"),
+        )
 
     async def change_group(
         self, group_id: int, callback: CallbackQuery, state: FSMContext
     ) -> None:
         """Изменение группы пользователя."""
-        if await self.us.get_group(callback.from_user.id) == group_id:
+        if await self.us.get_profile(callback.from_user.id) == group_id:
             await callback.answer("Эта группа уже выбрана вами")
         else:
             await self.close_markup(callback)
@@ -469,20 +624,16 @@ class GetGroup(CallbackRouter):
 class ScheduleService:
     """Класс отправки расписания пользователю."""
 
-    def __init__(
-        self, schedule: list[dict] | list[str], message: Message
-    ) -> None:
+    def __init__(self, messages: list[str], message: Message) -> None:
         self.message = message
-        self.schedule = self.build_schedule(schedule)
+        self.schedule = messages or [Schedule().render([])]
 
-    @staticmethod
-    def fined_double_breaks(schedule: str) -> list[int]:
-        """Поиск индексов двойных переносов строк."""
-        breakers = []
-        for i in range(1, len(schedule)):
-            if schedule[i - 1 : i + 1] == "\n\n" and schedule[i - 2] != "*":
-                breakers.append(i)
-        return breakers
+    @classmethod
+    def from_lectures(
+        cls, schedule: list[dict], message: Message
+    ) -> "ScheduleService":
+        """Подготовка отправки расписания из списка пар."""
+        return cls(cls.build_schedule(schedule), message)
 
     @staticmethod
     def sort_schedule_by_date(schedule: list[dict]) -> dict[str, list[dict]]:
@@ -496,61 +647,33 @@ class ScheduleService:
 
         return sorted_schedule
 
-    def build_schedule(
-        self, unparse_schedule: list[dict] | list[str]
-    ) -> list[str]:
+    @classmethod
+    def build_schedule(cls, unparse_schedule: list[dict]) -> list[str]:
         """Сборка сообщений с расписанием для отправки пользователю."""
-        messages = []
-        message = ""
         if len(unparse_schedule) == 0:
             return [Schedule().render(unparse_schedule)]
 
-        if not isinstance(unparse_schedule[0], str):
-            sorted_schedule = self.sort_schedule_by_date(
-                unparse_schedule
-            ).values()
-        else:
-            sorted_schedule = unparse_schedule
-        for schedule in sorted_schedule:
-            message = self.add_schedule(schedule, message, messages)
-        if message != "":
-            messages.append(message)
-        return messages
-
-    def add_schedule(
-        self, schedule: list[str] | dict, message: str, messages: list[str]
-    ) -> str:
-        """Добавление расписания на день в список сообщений."""
-        if isinstance(schedule, str):
-            day_schedule = schedule
-        else:
-            day_schedule = Schedule().render(schedule)
-
-        if len(message + day_schedule) < 4096:
-            return message + day_schedule
-
-        if len(day_schedule) >= 4096:
-            double_breaks = self.fined_double_breaks(day_schedule)
-            half = double_breaks[len(double_breaks) // 2]
-            if len(message) != 0:
-                messages.append(message)
-            messages.append(day_schedule[:half])
-            return day_schedule[half:]
-
-        messages.append(message)
-        return ""
+        schedule = Schedule()
+        days = cls.sort_schedule_by_date(unparse_schedule).values()
+        blocks = chain.from_iterable(map(schedule.render_blocks, days))
+        return list(paginate(blocks))
 
     async def send_schedule(self) -> None:
-        """Отправление расписания пользователю."""
-        keyboard = None
-        for i in range(len(self.schedule)):
-            if i == len(self.schedule) - 1:
-                keyboard = kb.ChoiceDateKeyboard()
-            await self.message.answer(
-                text=self.schedule[i],
-                reply_markup=keyboard,
-                parse_mode="Markdown",
+        """Отправление расписания пользователю.
+
+        Все части ставятся в очередь исходящих сообщений сразу,
+        а очередь отправляет их по порядку.
+        """
+        keyboards = [None] * (len(self.schedule) - 1)
+        keyboards.append(kb.ChoiceDateKeyboard())
+        await asyncio.gather(
+            *(
+                self.message.answer(
+                    text=text, reply_markup=keyboard, parse_mode="Markdown"
+                )
+                for text, keyboard in zip(self.schedule, keyboards)
             )
+        )
 
         self.schedule.clear()
 
@@ -567,7 +690,7 @@ class GetSettings(MessageRouter):
 
     async def handle(self, message: Message) -> None:
         """Метод обработки сообщения."""
-        if await self.us.has_group(message.from_user.id):
+        if await self.us.get_profile(message.from_user.id) is not None:
             await message.answer(
                 text="Переходим в раздел настроек",
                 reply_markup=kb.ChangeGroupKeyboard(),
@@ -591,7 +714,7 @@ class RememberGroup(MessageRouter):
 
     async def handle(self, message: Message, state: FSMContext) -> None:
         """Метод обработки сообщения."""
-        if await self.us.has_group(message.from_user.id):
+        if await self.us.get_profile(message.from_user.id) is not None:
             await message.answer(
                 text=tmp.DONT_BREAK_ME,
             )
@@ -615,7 +738,7 @@ class ChangeUserGroup(MessageRouter):
 
     async def handle(self, message: Message, state: FSMContext) -> None:
         """Метод обработки сообщения."""
-        if not await self.us.has_group(message.from_user.id):
+        if await self.us.get_profile(message.from_user.id) is None:
             await message.answer(
                 text=tmp.DONT_BREAK_ME,
             )
@@ -639,7 +762,7 @@ class DeleteUserGroup(MessageRouter):
 
     async def handle(self, message: Message) -> None:
         """Метод обработки сообщения."""
-        if not await self.us.has_group(message.from_user.id):
+        if await self.us.get_profile(message.from_user.id) is None:
             await message.answer(
                 text=tmp.DONT_BREAK_ME,
             )
@@ -690,6 +813,14 @@ class Errors(ErrorRouter):
 
     async def handle(self, update: Update, error: exceptions) -> bool:
         """Метод обработки сообщения."""
-        await update.message.answer("Произошла непредвиденная ошибка")
+        message = update.message or update.callback_query.message
+        if isinstance(error, ServerNotAnswer):
+            self.logger.warning(f"Сервер ЧГУ не ответил на запрос {error}")
+            await message.answer(
+                text=tmp.SERVER_NOT_ANSWER,
+                reply_markup=kb.ChoiceDateKeyboard(),
+            )
+            return True
+        await message.answer("Произошла непредвиденная ошибка")
         self.logger.exception(error)
         return True
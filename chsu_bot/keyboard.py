@@ -1,8 +1,7 @@
 """Модуль для создания клавиатур."""
 
 from calendar import monthrange
-import datetime
-from itertools import zip_longest
+from itertools import groupby, zip_longest
 
 from aiogram.types import (
     InlineKeyboardButton,
@@ -10,6 +9,7 @@ from aiogram.types import (
     KeyboardButton,
     ReplyKeyboardMarkup,
 )
+import callback as cb
 
 month_by_number = {
     1: "Январь",
@@ -139,6 +139,7 @@ class ChoiceDateKeyboard(ReplyKeyboardMarkup):
                 [
                     KeyboardButton(text="На сегодня"),
                     KeyboardButton(text="На завтра"),
+                    KeyboardButton(text="На неделю"),
                 ],
                 [
                     KeyboardButton(text="Выбрать другой день"),
@@ -166,32 +167,23 @@ class CalendarMarkup(InlineKeyboardMarkup):
             ]
         )
 
-    def next_month(self) -> "CalendarMarkup":
-        """Получение данных на следующий месяц."""
-        current_month = datetime.date(self.year, self.month, 5)
-        current_days_count = monthrange(self.year, self.month)[1]
-        next_date = current_month + datetime.timedelta(days=current_days_count)
-        return CalendarMarkup(next_date.month, next_date.year)
-
-    def previous_month(self) -> "CalendarMarkup":
-        """Получение данных на предыдущий месяц."""
-        current_month = datetime.date(self.year, self.month, 5)
-        current_days_count = monthrange(self.year, self.month)[1]
-        next_date = current_month - datetime.timedelta(days=current_days_count)
-        return CalendarMarkup(next_date.month, next_date.year)
+    def shift_month(self, shift: int) -> tuple[int, int]:
+        """Получение месяца и года, отстоящих на shift месяцев."""
+        index = self.year * 12 + self.month - 1 + shift
+        return index % 12 + 1, index // 12
 
     def title(self) -> InlineKeyboardButton:
         """Создание заголовка календаря."""
         return InlineKeyboardButton(
             text=f"{month_by_number[self.month]} {self.year}",
-            callback_data="None",
+            callback_data=cb.NOOP.new(),
         )
 
     @staticmethod
     def days_header() -> list[InlineKeyboardButton]:
         """Добавление дней недели."""
         return [
-            InlineKeyboardButton(text=day, callback_data="None")
+            InlineKeyboardButton(text=day, callback_data=cb.NOOP.new())
             for day in days
         ]
 
@@ -199,18 +191,20 @@ class CalendarMarkup(InlineKeyboardMarkup):
         """Метод для заполнения календаря днями месяца."""
         start_day, days_count = monthrange(self.year, self.month)
         week_days = [
-            InlineKeyboardButton(text=" ", callback_data="None")
+            InlineKeyboardButton(text=" ", callback_data=cb.NOOP.new())
         ] * start_day
         for i in range(1, days_count + 1):
             week_days.append(
                 InlineKeyboardButton(
                     text=str(i),
-                    callback_data=(f"{i:02}.{self.month:02}.{self.year:04}"),
+                    callback_data=cb.DAY.new(
+                        f"{i:02}.{self.month:02}.{self.year:04}"
+                    ),
                 )
             )
         if len(week_days) % 7 != 0:
             week_days += [
-                InlineKeyboardButton(text=" ", callback_data="None")
+                InlineKeyboardButton(text=" ", callback_data=cb.NOOP.new())
             ] * (7 - len(week_days) % 7)
         return list(zip_longest(*[iter(week_days)] * 7))
 
@@ -218,11 +212,13 @@ class CalendarMarkup(InlineKeyboardMarkup):
         """Добавление кнопок для перемещения по календарю."""
         return [
             InlineKeyboardButton(
-                text="<", callback_data=f"back {self.month:02}.{self.year:04}"
+                text="<", callback_data=cb.MONTH.new(*self.shift_month(-1))
+            ),
+            InlineKeyboardButton(
+                text="Меню", callback_data=cb.CLOSE_CALENDAR.new()
             ),
-            InlineKeyboardButton(text="Меню", callback_data="menu"),
             InlineKeyboardButton(
-                text=">", callback_data=f"next {self.month:02}.{self.year:04}"
+                text=">", callback_data=cb.MONTH.new(*self.shift_month(1))
             ),
         ]
 
@@ -240,26 +236,48 @@ class Institutions(InlineKeyboardMarkup):
         """Создание клавиатуры с номерами групп/институтов."""
         return [
             [
-                InlineKeyboardButton(text="0", callback_data="0"),
-                InlineKeyboardButton(text="1", callback_data="1"),
-                InlineKeyboardButton(text="2", callback_data="2"),
+                InlineKeyboardButton(
+                    text="0", callback_data=cb.INSTITUTE.new("0")
+                ),
+                InlineKeyboardButton(
+                    text="1", callback_data=cb.INSTITUTE.new("1")
+                ),
+                InlineKeyboardButton(
+                    text="2", callback_data=cb.INSTITUTE.new("2")
+                ),
             ],
             [
-                InlineKeyboardButton(text="3", callback_data="3"),
-                InlineKeyboardButton(text="4", callback_data="4"),
-                InlineKeyboardButton(text="5", callback_data="5"),
+                InlineKeyboardButton(
+                    text="3", callback_data=cb.INSTITUTE.new("3")
+                ),
+                InlineKeyboardButton(
+                    text="4", callback_data=cb.INSTITUTE.new("4")
+                ),
+                InlineKeyboardButton(
+                    text="5", callback_data=cb.INSTITUTE.new("5")
+                ),
             ],
             [
-                InlineKeyboardButton(text="6", callback_data="6"),
-                InlineKeyboardButton(text="7", callback_data="7"),
-                InlineKeyboardButton(text="9", callback_data="9"),
+                InlineKeyboardButton(
+                    text="6", callback_data=cb.INSTITUTE.new("6")
+                ),
+                InlineKeyboardButton(
+                    text="7", callback_data=cb.INSTITUTE.new("7")
+                ),
+                InlineKeyboardButton(
+                    text="9", callback_data=cb.INSTITUTE.new("9")
+                ),
             ],
         ]
 
     @staticmethod
     def back_button() -> list[InlineKeyboardButton]:
         """Создание кнопки 'Назад'."""
-        return [InlineKeyboardButton(text="Назад", callback_data="back")]
+        return [
+            InlineKeyboardButton(
+                text="Назад", callback_data=cb.CLOSE_INSTITUTES.new()
+            )
+        ]
 
 
 class GroupKeyboard(InlineKeyboardMarkup):
@@ -272,13 +290,13 @@ class GroupKeyboard(InlineKeyboardMarkup):
         self.institute = institute
         self.part = part
         self.back_button = InlineKeyboardButton(
-            text="Назад", callback_data="back"
+            text="Назад", callback_data=cb.BACK_TO_INSTITUTES.new()
         )
         self.next_button = InlineKeyboardButton(
-            text=">", callback_data=f"next {institute} {self.part + 1}"
+            text=">", callback_data=cb.GROUP_PAGE.new(institute, part + 1)
         )
         self.previous_button = InlineKeyboardButton(
-            text="<", callback_data=f"previous {institute} {self.part - 1}"
+            text="<", callback_data=cb.GROUP_PAGE.new(institute, part - 1)
         )
 
         super().__init__(
@@ -295,10 +313,12 @@ class GroupKeyboard(InlineKeyboardMarkup):
             group_buttons.append(
                 [
                     InlineKeyboardButton(
-                        text=groups[i][0], callback_data=groups[i][1]
+                        text=groups[i][0],
+                        callback_data=cb.GROUP.new(groups[i][1]),
                     ),
                     InlineKeyboardButton(
-                        text=groups[i + 1][0], callback_data=groups[i + 1][1]
+                        text=groups[i + 1][0],
+                        callback_data=cb.GROUP.new(groups[i + 1][1]),
                     ),
                 ]
             )
@@ -306,7 +326,8 @@ class GroupKeyboard(InlineKeyboardMarkup):
             group_buttons.append(
                 [
                     InlineKeyboardButton(
-                        text=groups[-1][0], callback_data=groups[-1][1]
+                        text=groups[-1][0],
+                        callback_data=cb.GROUP.new(groups[-1][1]),
                     )
                 ]
             )
@@ -321,3 +342,39 @@ class GroupKeyboard(InlineKeyboardMarkup):
         elif self.part * 18 >= len(self.groups):
             return [self.previous_button, self.back_button]
         return [self.previous_button, self.back_button, self.next_button]
+
+
+class GroupPages:
+    """Класс готовых страниц клавиатуры групп для всех институтов.
+
+    Страницы строятся один раз для списка групп, отсортированного
+    по названию, и перестраиваются, только когда список заменяется.
+    """
+
+    def __init__(self) -> None:
+        self.groups: list[tuple[str, int]] | None = None
+        self.pages: dict[tuple[str, int], GroupKeyboard] = {}
+
+    def build(self, groups: list[tuple[str, int]]) -> None:
+        """Создание всех страниц для списка групп."""
+        self.groups = groups
+        self.pages = {}
+        for institute, institute_groups in groupby(
+            groups, key=lambda group: group[0][:1]
+        ):
+            institute_groups = list(institute_groups)
+            for part in range(1, (len(institute_groups) - 1) // 18 + 2):
+                self.pages[institute, part] = GroupKeyboard(
+                    institute_groups, institute, part
+                )
+
+    def get(
+        self, groups: list[tuple[str, int]], institute: str, part: int
+    ) -> GroupKeyboard:
+        """Получение страницы клавиатуры групп института."""
+        if groups is not self.groups:
+            self.build(groups)
+        page = self.pages.get((institute, part))
+        if page is None:
+            return GroupKeyboard([], institute, 1)
+        return page
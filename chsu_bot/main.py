@@ -1,59 +1,143 @@
 """Модуль запуска приложеня."""
 
 import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import contextlib
+import signal
 
-from aiogram import Bot, Dispatcher
-from aiogram.contrib.fsm_storage.memory import MemoryStorage
-import aiohttp
-import aiosqlite
+from aiogram import Dispatcher
 from config import Config
-from db import Groups, Users
+from db import Groups, Lectures, Migrations, Storage, Users
+from fsm_storage import SQLiteStorage
 from handler import BotLogic
 from logger import logger
+from monitoring import StatsReporter
 from parse import ChsuAPI
 from polling import Polling
 from schedule import Schedule
+from sender import QueuedBot
+import templtaes as tmp
+from throttling import ThrottlingMiddleware
+from timetable import Timetable
 from update_schedule import Reloader
 from webhook import Webhook
 
 
 async def main() -> None:
     """Запуск приложения."""
+    stop_on_sigterm()
     config = Config()
-    bot = Bot(config.BOTTOKEN)
-    dp = Dispatcher(bot, storage=MemoryStorage())
-    async with aiohttp.ClientSession() as session, aiosqlite.connect(
-        config.DBURL
-    ) as db_session:
-        groups_db = Groups(db_session)
-        await groups_db.create_table()
-        users_db = Users(db_session)
-        await users_db.create_table()
-        api = ChsuAPI(session)
-        groups = [
-            [int(elem["id"]), elem["title"]]
-            for elem in await api.get_groups_ids()
-        ]
-        await groups_db.add_group_ids(groups)
+    bot = QueuedBot(
+        config.BOTTOKEN,
+        logger,
+        config.SEND_RATE,
+        config.SEND_BURST,
+        config.SEND_CHAT_RATE,
+        config.SEND_CHAT_BURST,
+    )
+    async with ChsuAPI.from_config(config) as api, Storage(
+        config.DBURL, config.DB_READERS
+    ) as storage:
+        await Migrations(storage.writer).apply()
+        fsm_storage = SQLiteStorage(
+            storage,
+            config.FSM_TTL,
+            config.FSM_CACHE_SIZE,
+            config.FSM_FLUSH_INTERVAL,
+        )
+        dp = Dispatcher(bot, storage=fsm_storage)
+        groups_db = Groups(storage)
+        users_db = Users(
+            storage,
+            config.USERS_BATCH_SIZE,
+            config.USERS_FLUSH_INTERVAL,
+            config.USERS_CACHE_SIZE,
+        )
+        lectures_db = Lectures(storage)
+        await groups_db.load_index()
+        if not await api.try_update_token():
+            logger.warning("Не удалось войти на сервер ЧГУ при запуске")
         schedule = Schedule()
-        reloader = Reloader(logger, api, schedule, groups_db)
+        reloader = Reloader(
+            logger,
+            api,
+            schedule,
+            groups_db,
+            lectures_db,
+            config.SCHEDULE_HORIZON,
+            render_executor(config),
+            config.RENDER_BATCH_SIZE,
+        )
         await reloader.reload_schedule()
-        logic = BotLogic(logger, groups_db, users_db, api)
+        timetable = Timetable(api, lectures_db)
+        throttling = ThrottlingMiddleware(
+            config.THROTTLE_RATE,
+            config.THROTTLE_BURST,
+            config.THROTTLE_GLOBAL_RATE,
+            config.THROTTLE_GLOBAL_BURST,
+            config.THROTTLE_LIMITS,
+            config.THROTTLE_IDLE,
+            config.THROTTLE_MAX_BUCKETS,
+            tmp.TOO_MANY_REQUESTS,
+        )
+        logic = BotLogic(logger, groups_db, users_db, timetable, throttling)
         logic.register(dp)
-        tasks = [reloader.loop_update_schedule()]
-        if config.RUNTYPE == "polling":
-            await Polling(dp, tasks).run()
-        else:
-            await Webhook(
-                dp=dp,
-                bot=bot,
-                tasks=tasks,
-                webhook_path=f"/bot/{config.BOTTOKEN}",
-                webhook_host=f"{config.DOMEN}",
-                host=config.HOST,
-                port=config.PORT,
-            ).run()
+        reporter = StatsReporter(
+            logger,
+            {
+                "очереди отправки": bot.outbox.stats,
+                "ограничения запросов": throttling.stats,
+                "запросов к API": api.stats,
+                "кэша расписания": api.cache.stats,
+            },
+            config.STATS_INTERVAL,
+        )
+        tasks = [
+            reloader.loop_update_schedule(),
+            api.loop_update_token(),
+            fsm_storage.loop_expire(),
+            bot.outbox.run(),
+            reporter.loop_report(),
+        ]
+        try:
+            if config.RUNTYPE == "polling":
+                await Polling(dp, tasks).run()
+            else:
+                await Webhook(
+                    dp=dp,
+                    bot=bot,
+                    tasks=tasks,
+                    webhook_path=f"/bot/{config.BOTTOKEN}",
+                    webhook_host=f"{config.DOMEN}",
+                    host=config.HOST,
+                    port=config.PORT,
+                ).run()
+        finally:
+            await fsm_storage.close()
+            await users_db.close()
+
+
+def stop_on_sigterm() -> None:
+    """Отмена основной задачи по SIGTERM.
+
+    Docker останавливает контейнер сигналом SIGTERM, который без
+    обработчика завершает процесс, не выполнив блоки finally,
+    и незаписанные изменения пользователей теряются.
+    """
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, asyncio.current_task().cancel
+    )
+
+
+def render_executor(
+    config: Config,
+) -> ProcessPoolExecutor | ThreadPoolExecutor:
+    """Создание пула для отрисовки расписания."""
+    if config.RENDER_EXECUTOR == "process":
+        return ProcessPoolExecutor(config.RENDER_WORKERS)
+    return ThreadPoolExecutor(config.RENDER_WORKERS)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    with contextlib.suppress(asyncio.CancelledError):
+        asyncio.run(main())
@@ -0,0 +1,35 @@
+"""Модуль периодической записи статистики в лог."""
+
+import asyncio
+from typing import Callable
+
+from loguru._logger import Logger
+
+
+class StatsReporter:
+    """Класс периодической записи статистики компонентов бота.
+
+    Каждые interval секунд в лог пишется результат вызова каждого
+    источника, например глубина очереди отправки.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        sources: dict[str, Callable[[], dict]],
+        interval: float = 300,
+    ) -> None:
+        self.logger = logger
+        self.sources = sources
+        self.interval = interval
+
+    def report(self) -> None:
+        """Запись статистики всех источников."""
+        for name, stats in self.sources.items():
+            self.logger.info(f"Статистика {name}: {stats()}")
+
+    async def loop_report(self) -> None:
+        """Цикл записи статистики."""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
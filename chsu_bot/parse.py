@@ -1,85 +1,648 @@
 """Модуль получения расписания ЧГУ."""
 
+import asyncio
+import base64
+import codecs
+from collections import OrderedDict
+from contextlib import suppress
 import datetime
+import json
+import random
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable
 
 import aiohttp
+from config import Config
+from utils import dates_between, split_into_runs
+
+
+class ServerNotAnswer(Exception):
+    """Исключение, возникающее при недоступности сервера ЧГУ."""
+
+
+Payload = list[dict] | dict[int, dict[str, list[dict]]]
+Reader = Callable[[aiohttp.ClientResponse], Awaitable[Payload]]
+
+
+class JsonArrayDecoder:
+    """Инкрементальный декодер JSON-массива объектов.
+
+    Тело ответа передаётся частями, а наружу отдаются элементы
+    массива, которые уже получены целиком, поэтому в памяти
+    хранится только необработанный хвост ответа.
+    """
+
+    separators = re.compile(r"[\s,]*")
+
+    def __init__(self) -> None:
+        self.decoder = json.JSONDecoder(object_pairs_hook=self.make_object)
+        self.strings: dict[str, str] = {}
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.opened = False
+
+    def make_object(self, pairs: list[tuple[str, object]]) -> dict:
+        """Создание объекта с общими ключами и короткими строками.
+
+        Декодер разбирает элементы по одному и не может сам
+        переиспользовать одинаковые строки между ними, поэтому ключи
+        и короткие строковые значения (даты, время, названия)
+        хранятся в едином экземпляре.
+        """
+        strings = self.strings
+        return {
+            strings.setdefault(key, key): (
+                strings.setdefault(value, value)
+                if isinstance(value, str) and len(value) <= 64
+                else value
+            )
+            for key, value in pairs
+        }
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        """Добавление части ответа и получение готовых элементов."""
+        self.buffer += self.text.decode(chunk)
+        if not self.opened:
+            self.open_array()
+        return self.decode_items() if self.opened else []
+
+    def open_array(self) -> None:
+        """Пропуск открывающей скобки массива."""
+        self.buffer = self.buffer.lstrip()
+        if self.buffer and self.buffer[0] != "[":
+            raise aiohttp.ClientPayloadError("Ожидался JSON-массив")
+        if self.buffer:
+            self.buffer, self.opened = self.buffer[1:], True
+
+    def decode_items(self) -> list[dict]:
+        """Декодирование всех полностью полученных элементов."""
+        items = []
+        position = self.separators.match(self.buffer).end()
+        while not self.buffer.startswith("]", position):
+            try:
+                item, position = self.decoder.raw_decode(self.buffer, position)
+            except json.JSONDecodeError:
+                break
+            items.append(item)
+            position = self.separators.match(self.buffer, position).end()
+        self.buffer = self.buffer[position:]
+        return items
+
+    def close(self) -> None:
+        """Проверка того, что массив получен полностью."""
+        if not self.opened or self.buffer.strip() != "]":
+            raise aiohttp.ClientPayloadError("Ответ сервера оборван")
+
+
+async def iter_json_array(
+    content: aiohttp.StreamReader, chunk_size: int = 65536
+) -> AsyncIterator[dict]:
+    """Потоковый разбор JSON-массива объектов из тела ответа."""
+    decoder = JsonArrayDecoder()
+    async for chunk in content.iter_chunked(chunk_size):
+        for item in decoder.feed(chunk):
+            yield item
+    decoder.close()
+
+
+class RetryPolicy:
+    """Политика повторных запросов с экспоненциальной задержкой."""
+
+    def __init__(
+        self,
+        retries: int = 3,
+        timeout: float = 10,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8,
+    ) -> None:
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt: int) -> float:
+        """Расчёт задержки перед повторным запросом со случайным разбросом."""
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2**attempt)
+        )
+
+
+class CircuitBreaker:
+    """Размыкатель цепи для запросов к нестабильному серверу.
+
+    После threshold неудачных запросов подряд цепь размыкается,
+    и в течение reset_timeout секунд запросы сразу отклоняются.
+    Затем пропускается один пробный запрос: успех замыкает цепь,
+    неудача снова её размыкает.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Получение текущего состояния цепи."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        """Проверка возможности отправить запрос."""
+        state = self.state
+        if state == "open":
+            self.rejected += 1
+            return False
+        if state == "half-open":
+            self.opened_at = time.monotonic()
+        return True
+
+    def record_success(self) -> None:
+        """Учёт успешного запроса."""
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Учёт неудачного запроса."""
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict[str, int | str]:
+        """Получение статистики размыкателя."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+class Latency:
+    """Учёт времени ответа сервера."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Добавление времени очередного ответа."""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self) -> dict[str, float]:
+        """Получение статистики времени ответа."""
+        return {
+            "requests": self.count,
+            "avg_latency": round(self.total / max(self.count, 1), 3),
+            "max_latency": round(self.max, 3),
+        }
+
+
+class ConnectionProfile:
+    """Настройки пула соединений с сервером ЧГУ."""
+
+    def __init__(
+        self,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        connect_timeout: float = 5,
+        read_timeout: float = 10,
+        compress: bool = True,
+    ) -> None:
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.compress = compress
+
+    def build_session(self) -> aiohttp.ClientSession:
+        """Создание сессии с настроенным пулом соединений."""
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        headers = {} if self.compress else {"Accept-Encoding": "identity"}
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                connect=self.connect_timeout, sock_read=self.read_timeout
+            ),
+            headers=headers,
+            auto_decompress=self.compress,
+        )
+
+
+class ScheduleCache:
+    """LRU-кэш расписания групп по дням с ограниченным временем жизни."""
+
+    def __init__(self, maxsize: int = 20000, ttl: int = 1800) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.days: OrderedDict[
+            tuple[int, str], tuple[float, list[dict]]
+        ] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, group_id: int, date: str) -> list[dict] | None:
+        """Получение расписания группы на день из кэша."""
+        key = (group_id, date)
+        entry = self.days.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.days.pop(key, None)
+            self.misses += 1
+            return None
+        self.days.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, group_id: int, date: str, lectures: list[dict]) -> None:
+        """Сохранение расписания группы на день в кэш."""
+        key = (group_id, date)
+        self.days[key] = (time.monotonic() + self.ttl, lectures)
+        self.days.move_to_end(key)
+        while len(self.days) > self.maxsize:
+            self.days.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        """Получение статистики использования кэша."""
+        return {
+            "size": len(self.days),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
 
 
 class ChsuAPI:
     """Класс получения расписания ЧГУ."""
 
-    def __init__(self, session: aiohttp.ClientSession) -> None:
-        self.url = "http://api.chsu.ru/api/"
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        url: str = "http://api.chsu.ru/api/",
+        cache: ScheduleCache = None,
+        retry: RetryPolicy = None,
+        breaker: CircuitBreaker = None,
+        token_lifetime: int = 3600,
+        token_refresh_margin: int = 60,
+        bulk_timeout: float = 300,
+        bulk_breaker: CircuitBreaker = None,
+    ) -> None:
+        self.url = url
         self.headers = {"user-agent": "88005553535"}
         self.token_headers = self.headers.copy()
         self.data = {"username": "mobil", "password": "ds3m#2nn"}
         self.session = session
+        self.cache = cache or ScheduleCache()
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = Latency()
+        self.timeout = aiohttp.ClientTimeout(
+            total=self.retry.timeout,
+            connect=session.timeout.connect,
+            sock_read=session.timeout.sock_read,
+        )
+        self.bulk_breaker = bulk_breaker or CircuitBreaker()
+        self.bulk_timeout = aiohttp.ClientTimeout(
+            total=bulk_timeout,
+            connect=session.timeout.connect,
+            sock_read=session.timeout.sock_read,
+        )
+        self.in_flight: dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        self.token_lock = asyncio.Lock()
+        self.token_version = 0
+        self.token_expires = 0.0
+        self.token_lifetime = token_lifetime
+        self.token_refresh_margin = token_refresh_margin
 
-    async def update_token(self) -> None:
-        """Обновление токена в загаловках."""
-        async with self.session.post(
-            url=self.url + "auth/signin/",
-            headers=self.token_headers,
-            json=self.data,
-        ) as resp:
-            self.headers[
-                "Authorization"
-            ] = f"""Bearer {
-                (await resp.json())["data"]
-            }"""
+    @classmethod
+    def from_config(cls, config: Config) -> "ChsuAPI":
+        """Создание клиента с настройками из конфигурации."""
+        profile = ConnectionProfile(
+            config.API_LIMIT_PER_HOST,
+            config.API_KEEPALIVE_TIMEOUT,
+            config.API_DNS_CACHE_TTL,
+            config.API_CONNECT_TIMEOUT,
+            config.API_READ_TIMEOUT,
+            config.API_COMPRESS,
+        )
+        return cls(
+            profile.build_session(),
+            config.API_URL,
+            ScheduleCache(
+                config.SCHEDULE_CACHE_SIZE, config.SCHEDULE_CACHE_TTL
+            ),
+            RetryPolicy(
+                config.API_RETRIES,
+                config.API_TIMEOUT,
+                config.API_BACKOFF_BASE,
+                config.API_BACKOFF_MAX,
+            ),
+            CircuitBreaker(
+                config.API_BREAKER_THRESHOLD,
+                config.API_BREAKER_RESET_TIMEOUT,
+            ),
+            config.TOKEN_LIFETIME,
+            config.TOKEN_REFRESH_MARGIN,
+            config.API_BULK_TIMEOUT,
+            CircuitBreaker(
+                config.API_BREAKER_THRESHOLD,
+                config.API_BREAKER_RESET_TIMEOUT,
+            ),
+        )
 
-    async def get_groups_ids(self) -> list[dict[str, int]]:
-        """Получение списка всех групп."""
+    async def __aenter__(self) -> "ChsuAPI":
+        """Вход в контекст клиента."""
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Закрытие сессии при выходе из контекста клиента."""
+        await self.session.close()
+
+    async def update_token(self, version: int = None) -> None:
+        """Обновление токена в загаловках.
+
+        Обновление выполняется под блокировкой: если токен уже
+        сменился, пока вызов ждал своей очереди (передана устаревшая
+        версия), повторный вход не выполняется.
+        """
+        async with self.token_lock:
+            if version is not None and version != self.token_version:
+                return
+            async with self.session.post(
+                url=self.url + "auth/signin/",
+                headers=self.token_headers,
+                json=self.data,
+                timeout=self.timeout,
+            ) as resp:
+                token = await self.read_token(resp)
+            self.headers["Authorization"] = f"Bearer {token}"
+            self.token_version += 1
+            self.token_expires = time.monotonic() + self.get_token_lifetime(
+                token
+            )
+
+    @staticmethod
+    async def read_token(resp: aiohttp.ClientResponse) -> str:
+        """Получение токена из ответа на вход.
+
+        Ответ неожиданного вида считается ошибкой сервера, как и
+        оборванный ответ, чтобы его обрабатывали те же повторы.
+        """
+        resp.raise_for_status()
+        try:
+            return (await resp.json())["data"]
+        except (KeyError, TypeError, ValueError) as error:
+            raise aiohttp.ClientPayloadError(
+                "Сервер не выдал токен"
+            ) from error
+
+    async def try_update_token(self) -> bool:
+        """Обновление токена без выброса ошибок сервера.
+
+        Возвращает False, если войти не удалось. Тогда вход
+        повторится при первом запросе или в фоновом цикле.
+        """
+        try:
+            await self.update_token()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+        return True
+
+    def get_token_lifetime(self, token: str) -> float:
+        """Получение времени жизни токена из его содержимого."""
+        try:
+            payload = token.split(".")[1]
+            claims = json.loads(
+                base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            )
+            return claims["exp"] - claims.get("iat", time.time())
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+            return self.token_lifetime
+
+    def token_refresh_delay(self) -> float:
+        """Расчёт времени до заблаговременного обновления токена."""
+        refresh_at = self.token_expires - self.token_refresh_margin
+        return max(refresh_at - time.monotonic(), 1)
+
+    async def loop_update_token(self) -> None:
+        """Цикл заблаговременного обновления токена."""
         while True:
+            version = self.token_version
+            await asyncio.sleep(self.token_refresh_delay())
+            try:
+                await self.update_token(version)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.token_expires = (
+                    time.monotonic() + self.token_refresh_margin * 2
+                )
+
+    def get_limits(
+        self, bulk: bool
+    ) -> tuple[aiohttp.ClientTimeout, CircuitBreaker]:
+        """Получение тайм-аута и размыкателя цепи для запроса.
+
+        Загрузка расписания всех групп читает большой ответ, поэтому
+        у неё свой, более долгий тайм-аут и свой размыкатель:
+        её неудачи не должны отклонять запросы пользователей.
+        """
+        if bulk:
+            return self.bulk_timeout, self.bulk_breaker
+        return self.timeout, self.breaker
+
+    async def request(
+        self, path: str, reader: Reader = None, bulk: bool = False
+    ) -> Payload:
+        """Отправка запроса к серверу с ограниченным числом повторов."""
+        timeout, breaker = self.get_limits(bulk)
+        for attempt in range(self.retry.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry.delay(attempt - 1))
+            if not breaker.allow():
+                break
+            with suppress(aiohttp.ClientError, asyncio.TimeoutError):
+                return await self.observed_send(path, reader, timeout, breaker)
+        raise ServerNotAnswer(path)
+
+    async def observed_send(
+        self,
+        path: str,
+        reader: Reader,
+        timeout: aiohttp.ClientTimeout,
+        breaker: CircuitBreaker,
+    ) -> Payload:
+        """Попытка запроса с учётом неудачи в размыкателе цепи."""
+        try:
+            return await self.send(path, reader, timeout, breaker)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            breaker.record_failure()
+            raise
+
+    async def send(
+        self,
+        path: str,
+        reader: Reader,
+        timeout: aiohttp.ClientTimeout,
+        breaker: CircuitBreaker,
+    ) -> Payload:
+        """Одна попытка запроса с обновлением просроченного токена.
+
+        Тело успешного ответа читается переданной функцией,
+        по умолчанию оно целиком декодируется как JSON.
+        """
+        for _ in range(2):
+            version = self.token_version
+            started = time.monotonic()
             async with self.session.get(
-                url=self.url + "group/v1",
+                url=self.url + path,
                 allow_redirects=False,
                 headers=self.headers,
+                timeout=timeout,
             ) as resp:
-                try:
-                    return await resp.json()
-                except aiohttp.ContentTypeError:
-                    if resp.status != 302:
-                        return None
-                    await self.update_token()
+                self.latency.observe(time.monotonic() - started)
+                if resp.status != 302:
+                    resp.raise_for_status()
+                    breaker.record_success()
+                    if reader is None:
+                        return await resp.json()
+                    return await reader(resp)
+            await self.update_token(version)
+        raise aiohttp.ClientError("Не удалось обновить токен")
+
+    async def fetch(
+        self, path: str, reader: Reader = None, bulk: bool = False
+    ) -> Payload:
+        """Получение ответа сервера с объединением одинаковых запросов.
+
+        Пока запрос по адресу выполняется, все остальные вызовы
+        с тем же адресом ожидают его результат, не открывая
+        новых соединений.
+        """
+        future = self.in_flight.get(path)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self.request(path, reader, bulk))
+        self.in_flight[path] = future
+        future.add_done_callback(lambda _: self.in_flight.pop(path, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Получение статистики запросов к серверу."""
+        return {
+            "in_flight": len(self.in_flight),
+            "coalesced": self.coalesced,
+            **self.latency.stats(),
+            **{f"breaker_{k}": v for k, v in self.breaker.stats().items()},
+            **{
+                f"bulk_breaker_{k}": v
+                for k, v in self.bulk_breaker.stats().items()
+            },
+            **{f"pool_{k}": v for k, v in self.pool_stats().items()},
+        }
+
+    def pool_stats(self) -> dict[str, int]:
+        """Получение статистики использования пула соединений."""
+        # У TCPConnector нет публичного API для этих значений,
+        # поэтому они читаются из его внутренних структур.
+        connector = self.session.connector
+        return {
+            "limit_per_host": connector.limit_per_host,
+            "acquired": len(getattr(connector, "_acquired", ())),
+            "waiting": sum(
+                len(waiters)
+                for waiters in getattr(connector, "_waiters", {}).values()
+            ),
+            "idle": sum(
+                len(conns)
+                for conns in getattr(connector, "_conns", {}).values()
+            ),
+        }
+
+    async def get_groups_ids(self) -> list[dict[str, int]]:
+        """Получение списка всех групп."""
+        return await self.fetch("group/v1")
 
     async def get_schedule(
         self, group_id: int, start_date: str, end_date: str = None
     ) -> list[dict]:
-        """Получение расписания для конкретной группы."""
+        """Получение расписания для конкретной группы.
+
+        Расписание собирается по дням: дни, уже лежащие в кэше,
+        берутся из него, а у сервера запрашиваются только
+        непрерывные отрезки отсутствующих дней.
+        """
+        dates = dates_between(start_date, end_date or start_date)
+        days = {date: self.cache.get(group_id, date) for date in dates}
+        missing = [date for date in dates if days[date] is None]
+        runs = split_into_runs(missing, dates)
+        fetched = await asyncio.gather(
+            *(self.fetch_schedule(group_id, run[0], run[-1]) for run in runs)
+        )
+        for run, schedule in zip(runs, fetched):
+            days.update(self.store_days(group_id, run, schedule))
+        return [lecture for date in dates for lecture in days[date]]
+
+    def store_days(
+        self, group_id: int, dates: list[str], schedule: list[dict]
+    ) -> dict[str, list[dict]]:
+        """Раскладка полученного расписания по дням и сохранение в кэш."""
+        days = {date: [] for date in dates}
+        for lecture in schedule:
+            days.setdefault(lecture["dateEvent"], []).append(lecture)
+        for date in dates:
+            self.cache.put(group_id, date, days[date])
+        return days
+
+    async def fetch_schedule(
+        self, group_id: int, start_date: str, end_date: str
+    ) -> list[dict]:
+        """Запрос расписания группы за временной промежуток у сервера."""
         body_request = (
             f"timetable/v1/from/{start_date}/"
-            f"to/{end_date or start_date}/groupId/{group_id}/"
+            f"to/{end_date}/groupId/{group_id}/"
         )
-        link = self.url + body_request
-        while True:
-            async with self.session.get(
-                url=link, allow_redirects=False, headers=self.headers
-            ) as resp:
-                try:
-                    return await resp.json()
-                except aiohttp.ContentTypeError:
-                    if resp.status != 302:
-                        return None
-                    await self.update_token()
-
-    async def get_all_groups_schedule(self) -> list[dict[str, str]]:
-        """Получение расписания для всех групп на ближайшие два дня."""
+        return await self.fetch(body_request)
+
+    async def get_all_groups_schedule(
+        self, days: int = 2
+    ) -> dict[int, dict[str, list[dict]]]:
+        """Получение расписания всех групп на ближайшие дни."""
         today = datetime.datetime.now()
-        tomorrow = today + datetime.timedelta(days=1)
+        last_day = today + datetime.timedelta(days=days - 1)
         body_request = "timetable/v1/event/from/{}/to/{}/".format(
             today.strftime("%d.%m.%Y"),
-            tomorrow.strftime("%d.%m.%Y"),
+            last_day.strftime("%d.%m.%Y"),
         )
-        while True:
-            async with self.session.get(
-                url=self.url + body_request,
-                allow_redirects=False,
-                headers=self.headers,
-            ) as resp:
-                try:
-                    return await resp.json()
-                except aiohttp.ContentTypeError:
-                    if resp.status != 302:
-                        return None
-                    await self.update_token()
+        return await self.fetch(
+            body_request, self.collect_by_groups_and_dates, bulk=True
+        )
+
+    @staticmethod
+    async def collect_by_groups_and_dates(
+        resp: aiohttp.ClientResponse,
+    ) -> dict[int, dict[str, list[dict]]]:
+        """Фасовка пар по группам и датам по мере чтения ответа."""
+        collected_schedule = {}
+        async for lecture in iter_json_array(resp.content):
+            date = lecture["dateEvent"]
+            for group in lecture["groups"]:
+                days = collected_schedule.setdefault(group["id"], {})
+                days.setdefault(date, []).append(lecture)
+        return collected_schedule
@@ -1,10 +1,16 @@
 """Обёртка для aiogram."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Coroutine
+from typing import Any, Awaitable, Callable, Coroutine
 
 from aiogram import Dispatcher
 from aiogram.dispatcher import filters, FSMContext
+from aiogram.dispatcher.filters.state import State
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.types import CallbackQuery
+from callback import CallbackData, get_key
+
+CallbackHandler = Callable[..., Awaitable[None]]
 
 
 class Router(ABC):
@@ -36,16 +42,81 @@ class MessageRouter(Router):
 
 
 class CallbackRouter(Router):
-    """Класс для создания хэндлеров, отвечающих на callback сообщения."""
+    """Класс для создания хэндлеров, отвечающих на callback сообщения.
+
+    Обработчики назначаются типам данных кнопок и вызываются только
+    в перечисленных состояниях.
+    """
+
+    def __init__(
+        self,
+        handlers: dict[CallbackData, CallbackHandler],
+        state: list[State],
+    ) -> None:
+        super().__init__(handler=None, state=state)
+        self.handlers = handlers
+
+    def register(self, router: "CallbackDispatcher") -> None:
+        """Регистрация хэндлеров в диспетчере кнопок."""
+        for callback_data, handler in self.handlers.items():
+            router.add(callback_data, handler, self.state)
+
+
+class CallbackDispatcher(Router):
+    """Класс маршрутизации callback сообщений по префиксу данных кнопки.
+
+    В aiogram регистрируется один хэндлер, который находит обработчик
+    по ключу типа кнопки: части данных до первого разделителя
+    (callback.get_key). Кнопки неизвестных типов
+    и старых версий, а также нажатые вне нужного состояния,
+    отклоняются коротким ответом stale_text.
+    """
+
+    def __init__(self, *routes: CallbackRouter, stale_text: str) -> None:
+        super().__init__(handler=self.dispatch, state="*")
+        self.routes = routes
+        self.stale_text = stale_text
+        self.handlers: dict[
+            str, tuple[CallbackData, CallbackHandler, frozenset[str]]
+        ] = {}
+
+    def add(
+        self,
+        callback_data: CallbackData,
+        handler: CallbackHandler,
+        states: list[State],
+    ) -> None:
+        """Добавление обработчика для типа данных кнопки."""
+        if callback_data.key in self.handlers:
+            raise ValueError(f"Префикс {callback_data.key} уже занят")
+        self.handlers[callback_data.key] = (
+            callback_data,
+            handler,
+            frozenset(state.state for state in states),
+        )
 
     def register(self, router: Dispatcher) -> None:
         """Регистрация хэндлеров."""
-        #router.callback_query_handler(state=self.state)(self.handler)
+        for route in self.routes:
+            route.register(self)
         router.register_callback_query_handler(
             callback=self.handler,
             state=self.state,
         )
 
+    async def dispatch(
+        self, callback: CallbackQuery, state: FSMContext
+    ) -> None:
+        """Вызов обработчика по данным кнопки."""
+        route = self.handlers.get(get_key(callback.data))
+        if route is not None:
+            callback_data, handler, states = route
+            values = callback_data.parse(callback.data)
+            if values is not None and await state.get_state() in states:
+                await handler(callback, state, *values)
+                return
+        await callback.answer(self.stale_text)
+
 
 class ErrorRouter(Router):
     """Класс для создания хэндлеров, отрабатывающих при ошибках."""
@@ -56,6 +127,18 @@ class ErrorRouter(Router):
         router.register_errors_handler(self.handler, self.filter)
 
 
+class MiddlewareRouter(Router):
+    """Класс для подключения middleware к диспетчеру."""
+
+    def __init__(self, middleware: BaseMiddleware) -> None:
+        super().__init__(handler=None)
+        self.middleware = middleware
+
+    def register(self, router: Dispatcher) -> None:
+        """Подключение middleware."""
+        router.middleware.setup(self.middleware)
+
+
 class Routes(Router):
     """Класс для регистрации хэндлеров."""
 
@@ -1,39 +1,136 @@
 """Модуль преобразования расписания в текст."""
 
 import datetime
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable, Iterator
+
+MESSAGE_LIMIT = 4096
+
+WEEK_DAYS = (
+    "понедельник",
+    "вторник",
+    "среда",
+    "четверг",
+    "пятница",
+    "суббота",
+    "воскресенье",
+)
+
+
+@lru_cache(maxsize=1024)
+def get_week_day(date: str) -> str:
+    """Получение названия дня недели на русском."""
+    day, month, year = map(int, date.split("."))
+    return WEEK_DAYS[datetime.date(year, month, day).weekday()]
+
+
+def split_block(block: str, limit: int) -> list[str]:
+    """Разрезание блока, который не помещается в одно сообщение."""
+    if len(block) < limit:
+        return [block]
+    return [block[i : i + limit - 1] for i in range(0, len(block), limit - 1)]
+
+
+def paginate(
+    blocks: Iterable[str], limit: int = MESSAGE_LIMIT
+) -> Iterator[str]:
+    """Разбиение текстовых блоков на сообщения короче limit символов.
+
+    Блоки собираются в сообщение за один проход, без повторных
+    склеек и пересчёта длины. Блок, который сам не помещается
+    в сообщение, разрезается на части, а пустые блоки пропускаются,
+    чтобы не отправить пустое сообщение.
+    """
+    chunk: list[str] = []
+    length = 0
+    for block in chain.from_iterable(
+        split_block(block, limit) for block in blocks if block
+    ):
+        if chunk and length + len(block) >= limit:
+            yield "".join(chunk)
+            chunk, length = [], 0
+        chunk.append(block)
+        length += len(block)
+    if chunk:
+        yield "".join(chunk)
 
 
 class Schedule:
     """Класс преобразования расписания в текст."""
 
     def __init__(self) -> None:
-        self.week_days = {
-            "Sunday": "воскресенье",
-            "Monday": "понедельник",
-            "Tuesday": "вторник",
-            "Wednesday": "среда",
-            "Thursday": "четверг",
-            "Friday": "пятница",
-            "Saturday": "суббота",
-        }
+        self.fragments: dict[int, tuple[dict, str]] = {}
 
     def render(self, unparse_schedule: list[dict[str, str]]) -> str:
         """Создание расписания в текстовом виде."""
-        schedule = ""
-        if unparse_schedule != []:
-            for i in range(len(unparse_schedule)):
-                if i == 0:
-                    date = unparse_schedule[i]["dateEvent"]
-                    schedule += (
-                        f"*Расписание на {date} - "
-                        f"{self.get_week_day(date)}*\n\n"
-                    )
-                schedule += self.get_duration_lesson(unparse_schedule[i])
-                schedule += self.get_lesson_and_type(unparse_schedule[i])
-                schedule += self.get_lecture(unparse_schedule[i])
-                schedule += self.get_auditory(unparse_schedule[i])
-            return schedule
-        return "Расписание не найдено"
+        if not unparse_schedule:
+            return "Расписание не найдено"
+        date = unparse_schedule[0]["dateEvent"]
+        return "".join(
+            [
+                f"*Расписание на {date} - {get_week_day(date)}*\n\n",
+                *map(self.render_lecture, unparse_schedule),
+            ]
+        )
+
+    def render_messages(
+        self,
+        unparse_schedule: list[dict[str, str]],
+        limit: int = MESSAGE_LIMIT,
+    ) -> list[str]:
+        """Создание расписания на день, разбитого на сообщения.
+
+        Сообщения делятся только по границам пар, и каждое
+        короче limit символов.
+        """
+        if not unparse_schedule:
+            return [self.render(unparse_schedule)]
+        return list(paginate(self.render_blocks(unparse_schedule), limit))
+
+    def render_blocks(
+        self, unparse_schedule: list[dict[str, str]]
+    ) -> Iterator[str]:
+        """Создание расписания на день по блокам.
+
+        Заголовок дня идёт одним блоком с первой парой, чтобы
+        не оказаться в конце сообщения без неё.
+        """
+        if not unparse_schedule:
+            return
+        date = unparse_schedule[0]["dateEvent"]
+        lectures = map(self.render_lecture, unparse_schedule)
+        yield (
+            f"*Расписание на {date} - {get_week_day(date)}*\n\n"
+            f"{next(lectures)}"
+        )
+        yield from lectures
+
+    def render_lecture(self, lecture: dict[str, str]) -> str:
+        """Создание текста одной пары.
+
+        Одна и та же пара потока входит в расписание нескольких групп
+        одним и тем же объектом, поэтому её текст запоминается и
+        создаётся один раз. Запомненные тексты держат ссылки на пары
+        и очищаются методом clear_fragments.
+        """
+        cached = self.fragments.get(id(lecture))
+        if cached is not None and cached[0] is lecture:
+            return cached[1]
+        text = "".join(
+            (
+                self.get_duration_lesson(lecture),
+                self.get_lesson_and_type(lecture),
+                self.get_lecture(lecture),
+                self.get_auditory(lecture),
+            )
+        )
+        self.fragments[id(lecture)] = (lecture, text)
+        return text
+
+    def clear_fragments(self) -> None:
+        """Очистка запомненных текстов пар."""
+        self.fragments.clear()
 
     @staticmethod
     def get_duration_lesson(lecture: dict[str, str]) -> str:
@@ -53,11 +150,10 @@ class Schedule:
     @staticmethod
     def get_lecture(lecture: dict[str, str]) -> str:
         """Получение преподавателей."""
-        lecturers = []
-        for lecturer in lecture["lecturers"]:
-            lecturers.append(lecturer["shortName"])
-
-        return f"🧑 {', '.join(lecturers)}\n"
+        lecturers = ", ".join(
+            lecturer["shortName"] for lecturer in lecture["lecturers"]
+        )
+        return f"🧑 {lecturers}\n"
 
     @staticmethod
     def get_auditory(lecture: dict[str, str]) -> str:
@@ -67,15 +163,13 @@ class Schedule:
         elif lecture["auditory"] is None:
             return "🏢 -/-\n\n"
         elif lecture["build"] is None:
-            return f"🏢 {lecture['auditory']['title']}"
+            return f"🏢 {lecture['auditory']['title']}\n\n"
         return (
             f"🏢 {lecture['auditory']['title']}, "
             f"{lecture['build']['title'].lower()}\n\n"
         )
 
-    def get_week_day(self, date: str) -> str:
+    @staticmethod
+    def get_week_day(date: str) -> str:
         """Получение названия дня недели на русском."""
-        day, month, year = map(int, date.split("."))
-        return self.week_days[
-            datetime.date(year=year, month=month, day=day).strftime("%A")
-        ]
+        return get_week_day(date)
@@ -0,0 +1,276 @@
+"""Модуль очереди исходящих сообщений."""
+
+import asyncio
+from collections import deque, OrderedDict
+import contextlib
+import heapq
+from itertools import count
+import time
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.types import Message
+from aiogram.utils.exceptions import RetryAfter
+from loguru._logger import Logger
+from throttling import TokenBucket
+
+INTERACTIVE = 0
+BULK = 1
+
+ChatId = int | str
+Send = Callable[..., Awaitable[Message]]
+
+
+class Outgoing:
+    """Класс сообщения, ожидающего отправки."""
+
+    __slots__ = ("priority", "kwargs", "future")
+
+    def __init__(self, priority: int, kwargs: dict) -> None:
+        self.priority = priority
+        self.kwargs = kwargs
+        self.future = asyncio.get_running_loop().create_future()
+
+    def set_result(self, message: Message) -> None:
+        """Передача отправленного сообщения ожидающему."""
+        if not self.future.done():
+            self.future.set_result(message)
+
+    def set_exception(self, error: Exception) -> None:
+        """Передача ошибки отправки ожидающему."""
+        if not self.future.done():
+            self.future.set_exception(error)
+
+
+class Outbox:
+    """Очередь исходящих сообщений с учётом ограничений Telegram.
+
+    Сообщения одного чата отправляются строго по порядку и не чаще
+    chat_rate в секунду, а все вместе не чаще rate в секунду. Из чатов,
+    готовых к отправке, первым обслуживается чат с более срочным
+    сообщением, поэтому ответы пользователям идут раньше рассылок.
+    При RetryAfter отправка приостанавливается на время, указанное
+    Telegram, а сообщение остаётся первым в очереди своего чата.
+    """
+
+    def __init__(
+        self,
+        send: Send,
+        logger: Logger,
+        rate: float = 30,
+        burst: float = 1,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+    ) -> None:
+        self.send_message = send
+        self.logger = logger
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.bucket = TokenBucket(rate, burst, time.monotonic())
+        self.chat_buckets: OrderedDict[ChatId, TokenBucket] = OrderedDict()
+        self.queues: dict[ChatId, deque[Outgoing]] = {}
+        self.ready: list[tuple[int, int, ChatId]] = []
+        self.delayed: list[tuple[float, int, ChatId]] = []
+        self.order = count()
+        self.wakeup = asyncio.Event()
+        self.sending: set[asyncio.Task] = set()
+        self.in_flight: set[ChatId] = set()
+        self.paused_until = 0.0
+        self.depth = {INTERACTIVE: 0, BULK: 0}
+        self.sent = 0
+        self.retries = 0
+
+    async def send(
+        self, chat_id: ChatId, priority: int = INTERACTIVE, **kwargs: object
+    ) -> Message:
+        """Постановка сообщения в очередь и ожидание его отправки."""
+        item = Outgoing(priority, kwargs)
+        queue = self.queues.get(chat_id)
+        if queue is None:
+            self.queues[chat_id] = deque([item])
+            self.push(chat_id)
+        else:
+            queue.append(item)
+        self.depth[priority] += 1
+        return await item.future
+
+    def push(self, chat_id: ChatId) -> None:
+        """Добавление чата к готовым к отправке."""
+        priority = self.queues[chat_id][0].priority
+        heapq.heappush(self.ready, (priority, next(self.order), chat_id))
+        self.wakeup.set()
+
+    async def run(self) -> None:
+        """Цикл отправки, перезапускаемый после непредвиденной ошибки.
+
+        Без него ожидающие message.answer не дождались бы ответа.
+        """
+        while True:
+            try:
+                await self.process()
+            except Exception:
+                self.logger.exception("Ошибка в цикле отправки сообщений")
+                self.recover()
+                await asyncio.sleep(1)
+
+    def recover(self) -> None:
+        """Восстановление очереди готовых чатов после ошибки."""
+        self.ready, self.delayed = [], []
+        for chat_id in self.queues.keys() - self.in_flight:
+            if self.queues[chat_id]:
+                self.push(chat_id)
+            else:
+                del self.queues[chat_id]
+
+    async def process(self) -> None:
+        """Цикл отправки сообщений из очереди."""
+        while True:
+            now = time.monotonic()
+            self.release(now)
+            delay = self.get_delay(now)
+            if delay == 0:
+                self.dispatch(heapq.heappop(self.ready)[2], now)
+            else:
+                await self.sleep(delay)
+
+    def release(self, now: float) -> None:
+        """Возврат к готовым чатов, у которых закончилась пауза."""
+        while self.delayed and self.delayed[0][0] <= now:
+            self.push(heapq.heappop(self.delayed)[2])
+
+    def get_delay(self, now: float) -> float | None:
+        """Получение времени до следующей отправки.
+
+        None означает, что отправлять нечего и нужно ждать
+        новых сообщений.
+        """
+        if not self.ready:
+            return self.delayed[0][0] - now if self.delayed else None
+        return max(self.bucket.wait(now), self.paused_until - now, 0)
+
+    async def sleep(self, delay: float | None) -> None:
+        """Ожидание новых сообщений не дольше delay секунд."""
+        self.wakeup.clear()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.wakeup.wait(), delay)
+
+    def dispatch(self, chat_id: ChatId, now: float) -> None:
+        """Запуск отправки первого сообщения чата."""
+        queue = self.queues[chat_id]
+        if queue[0].future.cancelled():
+            self.advance(chat_id)
+            return
+        bucket = self.get_chat_bucket(chat_id, now)
+        delay = bucket.wait(now)
+        if delay:
+            heapq.heappush(
+                self.delayed, (now + delay, next(self.order), chat_id)
+            )
+            return
+        bucket.consume(now)
+        self.bucket.consume(now)
+        self.in_flight.add(chat_id)
+        task = asyncio.create_task(self.deliver(chat_id, queue[0]))
+        self.sending.add(task)
+        task.add_done_callback(self.sending.discard)
+
+    async def deliver(self, chat_id: ChatId, item: Outgoing) -> None:
+        """Отправка сообщения и переход к следующему сообщению чата."""
+        try:
+            message = await self.send_message(chat_id=chat_id, **item.kwargs)
+        except RetryAfter as error:
+            self.in_flight.discard(chat_id)
+            self.pause(error.timeout)
+            self.push(chat_id)
+            return
+        except Exception as error:
+            item.set_exception(error)
+        else:
+            self.sent += 1
+            item.set_result(message)
+        self.in_flight.discard(chat_id)
+        self.advance(chat_id)
+
+    def advance(self, chat_id: ChatId) -> None:
+        """Удаление первого сообщения чата и отменённых за ним."""
+        queue = self.queues[chat_id]
+        self.depth[queue.popleft().priority] -= 1
+        while queue and queue[0].future.cancelled():
+            self.depth[queue.popleft().priority] -= 1
+        if queue:
+            self.push(chat_id)
+        else:
+            del self.queues[chat_id]
+
+    def pause(self, timeout: float) -> None:
+        """Приостановка отправки по требованию Telegram."""
+        self.retries += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + timeout)
+        self.logger.warning(
+            f"Telegram ограничил отправку на {timeout} с, "
+            f"в очереди {sum(self.depth.values())} сообщений"
+        )
+
+    def get_chat_bucket(self, chat_id: ChatId, now: float) -> TokenBucket:
+        """Получение корзины токенов чата.
+
+        Корзины, которые успели наполниться, ничем не отличаются
+        от новых, поэтому удаляются.
+        """
+        refill_time = self.chat_burst / self.chat_rate
+        while self.chat_buckets:
+            bucket = next(iter(self.chat_buckets.values()))
+            if now - bucket.updated < refill_time:
+                break
+            self.chat_buckets.popitem(last=False)
+        if chat_id not in self.chat_buckets:
+            self.chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst, now
+            )
+        self.chat_buckets.move_to_end(chat_id)
+        return self.chat_buckets[chat_id]
+
+    def stats(self) -> dict[str, int]:
+        """Получение глубины очереди и статистики отправки."""
+        return {
+            "queued": sum(self.depth.values()),
+            "interactive": self.depth[INTERACTIVE],
+            "bulk": self.depth[BULK],
+            "chats": len(self.queues),
+            "sending": len(self.sending),
+            "sent": self.sent,
+            "retries": self.retries,
+        }
+
+
+class QueuedBot(Bot):
+    """Бот, отправляющий все сообщения через общую очередь.
+
+    Ответы обработчиков через message.answer тоже попадают
+    в очередь. Рассылки передают priority=BULK.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        logger: Logger,
+        rate: float = 30,
+        burst: float = 1,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+    ) -> None:
+        super().__init__(token)
+        self.outbox = Outbox(
+            super().send_message, logger, rate, burst, chat_rate, chat_burst
+        )
+
+    async def send_message(
+        self,
+        chat_id: ChatId,
+        text: str,
+        *,
+        priority: int = INTERACTIVE,
+        **kwargs: object,
+    ) -> Message:
+        """Отправка сообщения через очередь."""
+        return await self.outbox.send(chat_id, priority, text=text, **kwargs)
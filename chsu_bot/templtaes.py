@@ -15,6 +15,10 @@ CHOICE_POST_TYPE = "Выберите тип поста"
 
 CHOOSE_FIRST_INSTITUTE_NUMBER = "Выберите первую цифру вашей группы"
 
+STALE_BUTTON = "Эта кнопка устарела, начните выбор заново"
+
+TOO_MANY_REQUESTS = "Слишком много запросов, подождите немного"
+
 GET_POST_TEXT = "Введите текст для поста"
 
 GET_POST_PHOTO = "Отправьте мне фото для поста"
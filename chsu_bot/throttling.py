@@ -0,0 +1,157 @@
+"""Модуль ограничения частоты запросов пользователей."""
+
+from collections import OrderedDict
+import time
+
+from aiogram.dispatcher.handler import CancelHandler, current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+from callback import get_key
+
+
+class TokenBucket:
+    """Класс корзины токенов.
+
+    Корзина вмещает capacity токенов и пополняется со скоростью rate
+    токенов в секунду. Каждый запрос забирает один токен.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        """Пополнение корзины за прошедшее время."""
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Получение времени в секундах до появления токена."""
+        self.refill(now)
+        return max(1 - self.tokens, 0) / self.rate
+
+    def consume(self, now: float) -> bool:
+        """Получение токена, если он есть."""
+        self.refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Класс ограничения частоты запросов к обработчикам.
+
+    У каждого пользователя своя корзина токенов, а для маршрутов
+    из limits отдельная корзина на каждый маршрут. Маршрутом сообщения
+    считается имя класса обработчика, а маршрутом нажатия на кнопку
+    ключ её данных. Если задан global_rate, общая корзина ограничивает
+    поток запросов от всех пользователей вместе. Токен списывается,
+    только если запрос пропускают все корзины. Пользователь получает
+    throttled_text на первый отклонённый запрос подряд, остальные
+    отбрасываются молча. Корзины, которые не использовались дольше
+    max_idle секунд, удаляются, а их число не превышает max_buckets.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1,
+        capacity: float = 5,
+        global_rate: float | None = None,
+        global_capacity: float = 100,
+        limits: dict[str, tuple[float, float]] | None = None,
+        max_idle: float = 600,
+        max_buckets: int = 100000,
+        throttled_text: str = "",
+    ) -> None:
+        super().__init__()
+        self.rate = rate
+        self.capacity = capacity
+        self.limits = limits or {}
+        self.max_idle = max_idle
+        self.max_buckets = max_buckets
+        self.throttled_text = throttled_text
+        self.shared_buckets = []
+        if global_rate is not None:
+            self.shared_buckets.append(
+                TokenBucket(global_rate, global_capacity, time.monotonic())
+            )
+        self.buckets: OrderedDict[
+            tuple[int, str | None], TokenBucket
+        ] = OrderedDict()
+        self.notified: set[int] = set()
+        self.throttled = 0
+
+    def get_bucket(self, user_id: int, route: str, now: float) -> TokenBucket:
+        """Получение корзины пользователя для маршрута."""
+        key = (user_id, route if route in self.limits else None)
+        if key not in self.buckets:
+            rate, capacity = self.limits.get(route, (self.rate, self.capacity))
+            self.buckets[key] = TokenBucket(rate, capacity, now)
+        self.buckets.move_to_end(key)
+        return self.buckets[key]
+
+    def evict(self, now: float) -> None:
+        """Удаление давно не использованных корзин."""
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            idle = now - bucket.updated >= self.max_idle
+            if not idle and len(self.buckets) <= self.max_buckets:
+                break
+            del self.buckets[key]
+            self.notified.discard(key[0])
+
+    def allow(self, user_id: int, route: str) -> bool:
+        """Проверка, можно ли обработать запрос."""
+        now = time.monotonic()
+        buckets = [self.get_bucket(user_id, route, now), *self.shared_buckets]
+        allowed = not any(bucket.wait(now) for bucket in buckets)
+        if allowed:
+            for bucket in buckets:
+                bucket.consume(now)
+            self.notified.discard(user_id)
+        else:
+            self.throttled += 1
+        self.evict(now)
+        return allowed
+
+    def should_notify(self, user_id: int) -> bool:
+        """Проверка, нужно ли сообщить пользователю об ограничении."""
+        if user_id in self.notified:
+            return False
+        self.notified.add(user_id)
+        return True
+
+    @staticmethod
+    def get_route() -> str:
+        """Получение имени класса текущего обработчика."""
+        handler = current_handler.get()
+        if hasattr(handler, "__self__"):
+            return type(handler.__self__).__name__
+        return handler.__name__
+
+    async def on_process_message(self, message: Message, data: dict) -> None:
+        """Короткий ответ на сообщения сверх лимита."""
+        user_id = message.from_user.id
+        if not self.allow(user_id, self.get_route()):
+            if self.should_notify(user_id):
+                await message.answer(self.throttled_text)
+            raise CancelHandler()
+
+    async def on_process_callback_query(
+        self, callback: CallbackQuery, data: dict
+    ) -> None:
+        """Короткий ответ на нажатия кнопок сверх лимита."""
+        if not self.allow(callback.from_user.id, get_key(callback.data)):
+            await callback.answer(self.throttled_text)
+            raise CancelHandler()
+
+    def stats(self) -> dict[str, int]:
+        """Получение статистики ограничений."""
+        return {"buckets": len(self.buckets), "throttled": self.throttled}
@@ -0,0 +1,36 @@
+"""Модуль получения расписания из локального хранилища и API ЧГУ."""
+
+from db import Lectures
+from parse import ChsuAPI
+from utils import dates_between, split_into_runs
+
+
+class Timetable:
+    """Класс получения расписания группы за временной промежуток.
+
+    Дни, загруженные при обновлении расписания, читаются из
+    хранилища пар, остальные запрашиваются у API ЧГУ.
+    """
+
+    def __init__(self, api: ChsuAPI, lectures: Lectures) -> None:
+        self.api = api
+        self.lectures = lectures
+
+    async def get_schedule(
+        self, group_id: int, start_date: str, end_date: str = None
+    ) -> list[dict]:
+        """Получение расписания для конкретной группы."""
+        dates = dates_between(start_date, end_date or start_date)
+        stored = [date for date in dates if self.lectures.covers(date)]
+        missing = [date for date in dates if not self.lectures.covers(date)]
+        schedule = []
+        for run in split_into_runs(stored, dates):
+            schedule += await self.lectures.get_schedule(
+                group_id, run[0], run[-1]
+            )
+        for run in split_into_runs(missing, dates):
+            schedule += await self.api.get_schedule(group_id, run[0], run[-1])
+        order = {date: i for i, date in enumerate(dates)}
+        return sorted(
+            schedule, key=lambda lecture: order[lecture["dateEvent"]]
+        )
@@ -1,14 +1,53 @@
 """Модуль обновления расписания в БД."""
 
 import asyncio
+from concurrent.futures import Executor
 import datetime
+import hashlib
+import json
 
-from db import Groups
+from db import Groups, Lectures
 from loguru._logger import Logger
-from parse import ChsuAPI
+from parse import ChsuAPI, ServerNotAnswer
 from schedule import Schedule
 
 
+class LoopLagMonitor:
+    """Измерение задержек цикла событий.
+
+    Фоновая задача регулярно засыпает на interval секунд, а всё,
+    на что она проснулась позже, считается временем, в течение
+    которого цикл событий был занят и не обрабатывал обновления.
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.task = None
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        """Запуск измерения."""
+        self.task = asyncio.create_task(self.run())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Остановка измерения."""
+        await asyncio.sleep(self.interval)
+        self.task.cancel()
+
+    async def run(self) -> None:
+        """Цикл измерения задержек."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0)
+            self.max_lag = max(self.max_lag, lag)
+            self.total_lag += lag
+
+
 class Reloader:
     """Класс обновления расписания."""
 
@@ -18,40 +57,76 @@ class Reloader:
         api: ChsuAPI,
         schedule: Schedule,
         group_storage: Groups,
+        lecture_storage: Lectures,
+        horizon: int = 2,
+        executor: Executor = None,
+        batch_size: int = 100,
     ) -> None:
         self.logger = logger
         self.api = api
         self.schedule = schedule
         self.group_storage = group_storage
+        self.lecture_storage = lecture_storage
+        self.horizon = max(horizon, 2)
+        self.fingerprints: dict[int, tuple[str, str]] = {}
+        self.executor = executor
+        self.batch_size = batch_size
 
     async def reload_schedule(self, waiting_time: int = 0) -> None:
         """Обновление расписания."""
         await asyncio.sleep(waiting_time)
         self.logger.info("Начался процесс обновления расписания")
-        schedules = []
-        unparsed_schedule = await self.api.get_all_groups_schedule()
-        collect_schedule = self.collect_schedule_by_ids_and_dates(
-            unparsed_schedule
+        await self.refresh_groups()
+        async with LoopLagMonitor() as lag:
+            await self.update_schedule()
+        self.logger.info(
+            "Максимальная задержка цикла событий при обновлении: "
+            f"{lag.max_lag:.3f} с, суммарная: {lag.total_lag:.3f} с"
         )
-        for group_id in collect_schedule.keys():
-            today, tomorrow = self.split_schedule(collect_schedule[group_id])
-            schedules.append(
-                [
-                    self.schedule.render(today),
-                    self.schedule.render(tomorrow),
-                    group_id,
-                ]
-            )
 
-        for group_id in await self.group_storage.unused_id(
-            list(collect_schedule)
-        ):
-            schedules.append(
-                [self.schedule.render([]), self.schedule.render([]), group_id]
+    async def refresh_groups(self) -> None:
+        """Обновление списка групп."""
+        try:
+            groups = await self.api.get_groups_ids()
+        except ServerNotAnswer:
+            self.logger.error(
+                "Сервер ЧГУ не ответил, список групп не обновлён"
             )
+            return
+        if not groups:
+            self.logger.error("Сервер ЧГУ вернул пустой список групп")
+            return
+        added, renamed, removed = await self.group_storage.refresh_groups(
+            [(int(group["id"]), group["title"]) for group in groups]
+        )
+        for group_id in removed:
+            self.fingerprints.pop(group_id, None)
+        self.logger.info(
+            f"Список групп обновлён: добавлено {len(added)}, "
+            f"переименовано {len(renamed)}, удалено {len(removed)}"
+        )
 
+    async def update_schedule(self) -> None:
+        """Загрузка, отрисовка и сохранение расписания."""
+        dates = self.get_horizon_dates()
+        try:
+            collect_schedule = await self.api.get_all_groups_schedule(
+                self.horizon
+            )
+        except ServerNotAnswer:
+            self.logger.error("Сервер ЧГУ не ответил, обновление пропущено")
+            return
+        await self.lecture_storage.replace_schedule(collect_schedule, dates)
+        groups = dict.fromkeys(
+            await self.group_storage.unused_id(list(collect_schedule)), {}
+        )
+        groups.update(collect_schedule)
+        schedules, fingerprints = await self.render_changed(groups, *dates[:2])
         await self.group_storage.update_groups_schedule(schedules)
-
+        self.fingerprints.update(fingerprints)
+        self.logger.info(
+            f"Расписание изменилось у {len(schedules)} из {len(groups)} групп"
+        )
         self.logger.info("Расписание успешно обнолвено")
 
     async def loop_update_schedule(self) -> None:
@@ -59,37 +134,72 @@ class Reloader:
         while True:
             await self.reload_schedule(self.get_waiting_time())
 
-    @staticmethod
-    def collect_schedule_by_ids_and_dates(schedule: dict) -> dict:
-        """Фасовка пар по группам и датам."""
-        collected_schedule = {}
-        for lecture in schedule:
-            for group in lecture["groups"]:
-                group_id = group["id"]
-                if collected_schedule.get(group_id) is None:
-                    collected_schedule[group_id] = {}
-
-                date = lecture["dateEvent"]
-                if collected_schedule[group_id].get(date) is None:
-                    collected_schedule[group_id][date] = []
-
-                collected_schedule[group_id][date].append(lecture)
-
-        return collected_schedule
+    async def render_changed(
+        self,
+        groups: dict[int, dict[str, list[dict]]],
+        today: str,
+        tomorrow: str,
+    ) -> tuple[list[list[str | int]], dict[int, tuple[str, str]]]:
+        """Отрисовка изменившегося расписания пачками вне цикла событий."""
+        items = [
+            (
+                group_id,
+                days.get(today, []),
+                days.get(tomorrow, []),
+                self.fingerprints.get(group_id),
+            )
+            for group_id, days in groups.items()
+        ]
+        loop = asyncio.get_running_loop()
+        schedules = []
+        fingerprints = {}
+        for start in range(0, len(items), self.batch_size):
+            batch = await loop.run_in_executor(
+                self.executor,
+                render_batch,
+                self.schedule,
+                items[start : start + self.batch_size],
+            )
+            for group_id, fingerprint, texts in batch:
+                if texts is not None:
+                    fingerprints[group_id] = fingerprint
+                    schedules.append([*texts, group_id])
+        self.schedule.clear_fragments()
+        return schedules, fingerprints
 
     @staticmethod
-    def split_schedule(
-        schedule: dict[str, dict[str, list[dict[str, str]]]]
-    ) -> tuple[list[dict[str, str]], list[dict[str, str]]]:
-        """Разбиение полученного расписания на два дня."""
-        dates = list(schedule)
-        if len(schedule) == 2:
-            return schedule[dates[0]], schedule[dates[1]]
-
-        current_date = datetime.datetime.now().strftime("%d.%m.%Y")
-        if dates[0] == current_date:
-            return schedule[dates[0]], []
-        return [], schedule[dates[0]]
+    def fingerprint(lectures: list[dict]) -> str:
+        """Получение отпечатка расписания на день.
+
+        В отпечаток попадают только поля, которые используются
+        при отрисовке расписания.
+        """
+        normalized = [
+            [
+                lecture["dateEvent"],
+                lecture["startTime"],
+                lecture["endTime"],
+                lecture["abbrlessontype"],
+                lecture["discipline"]["title"],
+                [lecturer["shortName"] for lecturer in lecture["lecturers"]],
+                (lecture["auditory"] or {}).get("title"),
+                (lecture["build"] or {}).get("title"),
+                lecture["onlineEvent"] is not None,
+            ]
+            for lecture in lectures
+        ]
+        return hashlib.blake2b(
+            json.dumps(normalized, ensure_ascii=False).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+    def get_horizon_dates(self) -> list[str]:
+        """Получение дат, на которые расписание загружается заранее."""
+        today = datetime.datetime.now()
+        return [
+            (today + datetime.timedelta(days=i)).strftime("%d.%m.%Y")
+            for i in range(self.horizon)
+        ]
 
     @staticmethod
     def get_waiting_time() -> int:
@@ -97,3 +207,31 @@ class Reloader:
         time_now = datetime.datetime.now()
         next_reload_time = (time_now.hour // 6 + 1) * 6 * 60
         return (next_reload_time - time_now.hour * 60 - time_now.minute) * 60
+
+
+def render_batch(
+    schedule: Schedule,
+    batch: list[tuple[int, list[dict], list[dict], tuple[str, str] | None]],
+) -> list[tuple[int, tuple[str, str], tuple[str, str] | None]]:
+    """Отрисовка пачки групп вне цикла событий.
+
+    Функция принимает и возвращает только простые данные, поэтому
+    может выполняться как в потоке, так и в отдельном процессе.
+    Расписание каждого дня сразу разбивается на готовые к отправке
+    сообщения. Для групп, отпечаток которых не изменился, текст
+    не создаётся.
+    """
+    rendered = []
+    for group_id, today, tomorrow, previous in batch:
+        fingerprint = (
+            Reloader.fingerprint(today),
+            Reloader.fingerprint(tomorrow),
+        )
+        texts = None
+        if fingerprint != previous:
+            texts = tuple(
+                json.dumps(schedule.render_messages(day), ensure_ascii=False)
+                for day in (today, tomorrow)
+            )
+        rendered.append((group_id, fingerprint, texts))
+    return rendered
@@ -15,3 +15,37 @@ def valid_date(fst_date: str, snd_date: str) -> bool:
     fst_date = datetime.datetime.strptime(fst_date, "%d.%m.%Y")
     snd_date = datetime.datetime.strptime(snd_date, "%d.%m.%Y")
     return snd_date >= fst_date
+
+
+def dates_between(start_date: str, end_date: str) -> list[str]:
+    """Получение всех дат временного диапазона включительно."""
+    start = datetime.datetime.strptime(start_date, "%d.%m.%Y")
+    end = datetime.datetime.strptime(end_date, "%d.%m.%Y")
+    return [
+        (start + datetime.timedelta(days=i)).strftime("%d.%m.%Y")
+        for i in range((end - start).days + 1)
+    ]
+
+
+def split_into_runs(dates: list[str], all_dates: list[str]) -> list[list[str]]:
+    """Разбиение дат на непрерывные отрезки внутри диапазона."""
+    positions = {date: i for i, date in enumerate(all_dates)}
+    runs = []
+    for date in dates:
+        if runs and positions[runs[-1][-1]] + 1 == positions[date]:
+            runs[-1].append(date)
+        else:
+            runs.append([date])
+    return runs
+
+
+def to_iso(date: str) -> str:
+    """Перевод даты из формата ДД.ММ.ГГГГ в ГГГГ-ММ-ДД."""
+    day, month, year = date.split(".")
+    return f"{year}-{month}-{day}"
+
+
+def from_iso(date: str) -> str:
+    """Перевод даты из формата ГГГГ-ММ-ДД в ДД.ММ.ГГГГ."""
+    year, month, day = date.split("-")
+    return f"{day}.{month}.{year}"
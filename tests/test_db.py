@@ -0,0 +1,112 @@
+"""Тесты хранилищ пользователей и пар."""
+
+import asyncio
+from pathlib import Path
+
+from db import Groups, Lectures, Migrations, Storage, Users
+from fake_api import FakeTimetable
+
+DATES = ["05.02.2024", "06.02.2024", "07.02.2024"]
+
+
+async def count_users_with_group(storage: Storage) -> int:
+    """Подсчёт записанных пользователей с группой."""
+    async with storage.reader() as conn, conn.execute(
+        "SELECT COUNT(*) FROM users WHERE groupId IS NOT NULL"
+    ) as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def close_during_flush() -> tuple[int, dict, set]:
+    """Закрытие, пока отложенная запись ждёт блокировку записи."""
+    async with Storage(":memory:") as storage:
+        await Migrations(storage.writer).apply()
+        users = Users(storage, batch_size=100, flush_interval=0.01)
+        await storage.write_lock.acquire()
+        for user_id in range(5):
+            await users.change_group(user_id, 1000)
+        await asyncio.sleep(0.05)
+        closing = asyncio.create_task(users.close())
+        await asyncio.sleep(0.01)
+        storage.write_lock.release()
+        await closing
+        written = await count_users_with_group(storage)
+        return written, users.groups, users.added
+
+
+def test_close_keeps_changes_of_running_flush() -> None:
+    """Закрытие не теряет изменения, которые уже начали записываться."""
+    written, groups, added = asyncio.run(close_during_flush())
+    assert written == 5
+    assert groups == {}
+    assert added == set()
+
+
+def collect(timetable: FakeTimetable, dates: list[str]) -> dict:
+    """Раскладка пар по группам и датам, как при обновлении."""
+    collected = {group["id"]: {} for group in timetable.groups}
+    for date in dates:
+        for lecture in timetable.get_events(date):
+            for group in lecture["groups"]:
+                collected[group["id"]].setdefault(date, []).append(lecture)
+    return collected
+
+
+async def replace_during_reads(path: Path) -> tuple[bool, int, set]:
+    """Чтение старого расписания, пока идёт замена."""
+    timetable = FakeTimetable(3, 2)
+    async with Storage(str(path), readers=2) as storage:
+        await Migrations(storage.writer).apply()
+        await Groups(storage).refresh_groups(
+            [(group["id"], group["title"]) for group in timetable.groups]
+        )
+        lectures = Lectures(storage)
+        await lectures.replace_schedule(
+            collect(timetable, DATES[:2]), DATES[:2]
+        )
+        await storage.write_lock.acquire()
+        replacing = asyncio.create_task(
+            lectures.replace_schedule(collect(timetable, DATES[1:]), DATES[1:])
+        )
+        await asyncio.sleep(0.01)
+        covered = lectures.covers(DATES[0])
+        old = await lectures.get_schedule(1000, DATES[0], DATES[0])
+        storage.write_lock.release()
+        await replacing
+        return covered, len(old), lectures.dates
+
+
+def test_replace_schedule_keeps_dates_until_commit(tmp_path: Path) -> None:
+    """Во время замены пар старые даты отдаются из БД."""
+    covered, old, dates = asyncio.run(
+        replace_during_reads(tmp_path / "bot.db")
+    )
+    assert covered
+    assert old > 0
+    assert dates == set(DATES[1:])
+
+
+async def remove_group_of_user(path: Path) -> tuple[list, list, tuple]:
+    """Удаление группы, которую выбрал пользователь."""
+    async with Storage(str(path), readers=2) as storage:
+        await Migrations(storage.writer).apply()
+        groups = Groups(storage)
+        await groups.refresh_groups([(1000, "А"), (1001, "Б")])
+        users = Users(storage)
+        await users.change_group(1, 1001)
+        await users.close()
+        await groups.refresh_groups([(1000, "А")])
+        return (
+            await groups.td_schedule(1001),
+            await groups.tm_schedule(1001),
+            await Users(storage).select_group(1),
+        )
+
+
+def test_removed_group_is_cleared(tmp_path: Path) -> None:
+    """Удалённая группа не ломает расписание и сбрасывается у людей."""
+    today, tomorrow, row = asyncio.run(
+        remove_group_of_user(tmp_path / "bot.db")
+    )
+    assert today == tomorrow == []
+    assert row == (None,)
@@ -0,0 +1,52 @@
+"""Тесты хранилища состояний FSM."""
+
+import asyncio
+import datetime
+from pathlib import Path
+
+from db import Migrations, Storage
+from fsm_storage import SQLiteStorage
+
+STATE = "ScheduleDateSelection:date"
+DATE = datetime.datetime(2024, 2, 5, 10, 30)
+
+
+async def dialogs(fsm: SQLiteStorage) -> None:
+    """Брошенный и законченный диалоги выбора даты."""
+    await fsm.set_state(chat=1, user=1, state=STATE)
+    await fsm.update_data(chat=1, user=1, date=DATE)
+    await fsm.set_state(chat=2, user=2, state=STATE)
+    await fsm.reset_state(chat=2, user=2)
+
+
+async def write_under_lock(path: Path) -> tuple[str, dict, str, dict, str]:
+    """Изменение состояний, пока блокировку записи держит обновление."""
+    async with Storage(str(path), readers=2) as storage:
+        await Migrations(storage.writer).apply()
+        fsm = SQLiteStorage(storage, flush_interval=0.01)
+        await storage.write_lock.acquire()
+        await asyncio.wait_for(dialogs(fsm), timeout=0.5)
+        cached = await fsm.get_state(chat=1, user=1)
+        cached_data = await fsm.get_data(chat=1, user=1)
+        storage.write_lock.release()
+        await fsm.close()
+        restarted = SQLiteStorage(storage)
+        return (
+            cached,
+            cached_data,
+            await restarted.get_state(chat=1, user=1),
+            await restarted.get_data(chat=1, user=1),
+            await restarted.get_state(chat=2, user=2),
+        )
+
+
+def test_writes_do_not_wait_for_write_lock(tmp_path: Path) -> None:
+    """Изменения отвечают из памяти и записываются после блокировки."""
+    cached, cached_data, state, data, finished = asyncio.run(
+        write_under_lock(tmp_path / "bot.db")
+    )
+    assert cached == STATE
+    assert cached_data == {"date": DATE}
+    assert state == STATE
+    assert data == {"date": DATE}
+    assert finished is None
@@ -0,0 +1,88 @@
+"""Тесты разбиения расписания на сообщения."""
+
+import datetime
+import random
+
+from fake_api import FakeTimetable
+import pytest
+from schedule import MESSAGE_LIMIT, paginate, Schedule
+
+ALPHABET = "абвгдеёжзabcxyz0123 .,*\n⌚🏫🧑🏢"
+SEEDS = range(50)
+
+
+def random_blocks(rnd: random.Random, limit: int) -> list[str]:
+    """Создание случайных блоков, в том числе длиннее limit."""
+    max_length = rnd.choice([limit // 4, limit, 3 * limit])
+    return [
+        "".join(rnd.choices(ALPHABET, k=rnd.randint(0, max_length)))
+        for _ in range(rnd.randint(0, 200))
+    ]
+
+
+def render_range(lectures_per_day: int, days: int = 31) -> list[str]:
+    """Создание блоков расписания группы за days дней."""
+    timetable = FakeTimetable(3, lectures_per_day, shared_share=0.5)
+    start = datetime.date(2024, 2, 1)
+    end = start + datetime.timedelta(days=days - 1)
+    events = timetable.get_range(
+        start.strftime("%d.%m.%Y"), end.strftime("%d.%m.%Y"), group_id=1000
+    )
+    schedule = Schedule()
+    blocks = []
+    for i in range(days):
+        date = (start + datetime.timedelta(days=i)).strftime("%d.%m.%Y")
+        day = [event for event in events if event["dateEvent"] == date]
+        blocks.extend(schedule.render_blocks(day))
+    return blocks
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("limit", [2, 3, 50, MESSAGE_LIMIT])
+def test_paginate_keeps_text(seed: int, limit: int) -> None:
+    """Склеенные сообщения совпадают с исходным текстом."""
+    blocks = random_blocks(random.Random(seed), limit)
+    assert "".join(paginate(blocks, limit)) == "".join(blocks)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("limit", [2, 3, 50, MESSAGE_LIMIT])
+def test_paginate_chunk_sizes(seed: int, limit: int) -> None:
+    """Каждое сообщение непустое и короче limit символов."""
+    blocks = random_blocks(random.Random(seed), limit)
+    for chunk in paginate(blocks, limit):
+        assert 0 < len(chunk) < limit
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_paginate_keeps_short_blocks_whole(seed: int) -> None:
+    """Блоки, которые помещаются в сообщение, не разрезаются."""
+    rnd = random.Random(seed)
+    limit = rnd.randint(10, 500)
+    blocks = [
+        "".join(rnd.choices(ALPHABET, k=rnd.randint(1, limit - 1)))
+        for _ in range(rnd.randint(1, 300))
+    ]
+    chunks = iter(paginate(blocks, limit))
+    chunk = next(chunks)
+    for block in blocks:
+        if not chunk:
+            chunk = next(chunks)
+        assert chunk.startswith(block)
+        chunk = chunk[len(block) :]
+    assert next(chunks, None) is None
+
+
+@pytest.mark.parametrize("lectures_per_day", [1, 8, 100, 400])
+def test_paginate_month_schedule(lectures_per_day: int) -> None:
+    """Расписание за месяц укладывается в сообщения без потерь."""
+    blocks = render_range(lectures_per_day)
+    chunks = list(paginate(blocks))
+    assert "".join(chunks) == "".join(blocks)
+    assert all(0 < len(chunk) < MESSAGE_LIMIT for chunk in chunks)
+
+
+def test_paginate_empty() -> None:
+    """Пустой список блоков не даёт сообщений."""
+    assert list(paginate([])) == []
+    assert list(paginate(["", ""])) == []